@@ -0,0 +1,76 @@
+import argparse
+import random
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "src"))
+
+from conditions import CONDITION_CLASSES  # noqa: E402
+from legacy_conditions import CONDITION_CLASSES as LEGACY_CONDITION_CLASSES  # noqa: E402
+from legacy_conditions import Strategy as LegacyStrategy  # noqa: E402
+from strategy import Strategy  # noqa: E402
+
+def random_conditions(classes, count: int, variables: int, cardinality: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(classes)(f"f{rng.randrange(variables)}", rng.randrange(cardinality))
+        for _ in range(count)
+    ]
+
+def rate(operation, count: int, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+def instance_size(condition) -> int:
+    # Slotted instances have no __dict__ to account for
+    return sys.getsizeof(condition) + (sys.getsizeof(condition.__dict__) if hasattr(condition, "__dict__") else 0)
+
+def measure(classes, strategy_class, args) -> dict:
+    # Same seed for both implementations, so both run on the same condition mix
+    conditions = random_conditions(classes, args.conditions, args.variables, args.cardinality, args.seed)
+    specs = [(condition.__class__, condition.variable, condition.value) for condition in conditions]
+    pairs = list(zip(conditions, conditions[1:]))
+
+    results = {
+        "size": instance_size(conditions[0]),
+        "construct": rate(lambda: [cls(variable, value) for cls, variable, value in specs], len(specs)),
+        "hash": rate(lambda: set(conditions), len(conditions)),
+        "contradicts": rate(lambda: [left.contradicts(right) for left, right in pairs], len(pairs)),
+        "negate": rate(lambda: [condition.negate() for condition in conditions], len(conditions)),
+    }
+    strategies = [
+        strategy_class(conditions=frozenset(conditions[start:start + args.strategy_size]), value=0.0)
+        for start in range(0, len(conditions), args.strategy_size)
+    ]
+    results["prune"] = rate(lambda: [strategy.prune() for strategy in strategies], len(strategies))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures condition construction, hashing, contradicts and Strategy.prune against the legacy code"
+    )
+    parser.add_argument("--conditions", type=int, default=200_000)
+    parser.add_argument("--strategy-size", type=int, default=12, help="Conditions per pruned strategy")
+    parser.add_argument("--variables", type=int, default=6)
+    parser.add_argument("--cardinality", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    legacy = measure(LEGACY_CONDITION_CLASSES, LegacyStrategy, args)
+    current = measure(CONDITION_CLASSES, Strategy, args)
+
+    print(f"{'':<13}{'legacy':>14}{'current':>14}{'speedup':>10}")
+    print(f"{'size:':<13}{legacy['size']:>12} B{current['size']:>12} B")
+    for name, operations in current.items():
+        if name == "size":
+            continue
+        print(f"{name + ':':<13}{legacy[name]:>14,.0f}{operations:>14,.0f}{operations / legacy[name]:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+# Condition classes as they were before the slotted, opcode-dispatched rewrite, and Strategy.prune as it was before
+# per-variable domains, kept verbatim (contradiction bugs included) as the timing baseline of benchmarks/conditions.py.
+# Not used by the package
+from dataclasses import dataclass
+from abc import ABC, abstractmethod
+from typing import Mapping, Self
+
+@dataclass
+class Condition(ABC):
+    variable: str
+    value: int | str
+
+    def __post_init__(self):
+        # Conditions end up in many frozensets, hash them once
+        self._hash = hash(self.variable) + hash(self.value) + hash(self.operator)
+
+    @property
+    @abstractmethod
+    def operator(self) -> str:
+        raise NotImplementedError(f"{self.__class__.__name__}.operator not implemented")
+    
+    @abstractmethod
+    def negate(self) -> Self:
+        raise NotImplementedError(f"{self.__class__.__name__}.negate not implemented")
+
+    @abstractmethod
+    def contradicts(self, other: "Condition") -> bool:
+        raise NotImplementedError(f"{self.__class__.__name__}.contradicts not implemented")
+
+    # A missing (or None) feature only satisfies !=
+    @abstractmethod
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        raise NotImplementedError(f"{self.__class__.__name__}.evaluate not implemented")
+    
+    def __str__(self) -> str:
+        return f"{self.variable}{self.operator}{self.value}"
+    
+    def __eq__(self, other: Self) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, Condition):
+            return False
+        return self.variable == other.variable and self.value == other.value and self.operator == other.operator
+    
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # String hashes are salted per process, rebuild through __init__ so the cached hash is recomputed
+        return self.__class__, (self.variable, self.value)
+
+class EqualsCondition(Condition):
+
+    def negate(self) -> Self:
+        return NotEqualsCondition(self.variable, self.value)
+    
+    def contradicts(self, other: Condition) -> bool:
+        if isinstance(other, EqualsCondition):
+            return self.variable == other.variable and self.value != other.value
+        elif isinstance(other, NotEqualsCondition):
+            return self.variable == other.variable and self.value == other.value
+        elif isinstance(other, GreaterThanCondition):
+            return self.variable == other.variable and self.value <= other.value
+        elif isinstance(other, GreaterThanOrEqualCondition):
+            return self.variable == other.variable and self.value < other.value
+        elif isinstance(other, LessThanCondition):
+            return self.variable == other.variable and self.value >= other.value
+        elif isinstance(other, LessThanOrEqualCondition):
+            return self.variable == other.variable and self.value > other.value
+        return False
+        
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        return features.get(self.variable) == self.value
+
+    @property
+    def operator(self) -> str:
+        return "="
+
+class NotEqualsCondition(Condition):
+
+    def negate(self) -> Self:
+        return EqualsCondition(self.variable, self.value)
+    
+    def contradicts(self, other: Condition) -> bool:
+        if isinstance(other, EqualsCondition):
+            return self.variable == other.variable and self.value == other.value
+        return False
+    
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        return features.get(self.variable) != self.value
+
+    @property
+    def operator(self) -> str:
+        return "!="
+    
+class GreaterThanCondition(Condition):
+
+    def negate(self) -> Self:
+        return LessThanOrEqualCondition(self.variable, self.value)
+    
+    def contradicts(self, other: Condition) -> bool:
+        if isinstance(other, EqualsCondition):
+            return self.variable == other.variable and self.value >= other.value
+        if isinstance(other, LessThanCondition):
+            return self.variable == other.variable and self.value >= other.value
+        if isinstance(other, LessThanOrEqualCondition):
+            return self.variable == other.variable and self.value >= other.value
+        return False
+        
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature > self.value
+
+    @property
+    def operator(self) -> str:
+        return ">"
+
+class GreaterThanOrEqualCondition(Condition):
+   
+    def negate(self) -> Self:
+        return LessThanCondition(self.variable, self.value)
+    
+    def contradicts(self, other: Condition) -> bool:
+        if isinstance(other, EqualsCondition):
+            return self.variable == other.variable and self.value > other.value
+        if isinstance(other, LessThanCondition):
+            return self.variable == other.variable and self.value > other.value
+        if isinstance(other, LessThanOrEqualCondition):
+            return self.variable == other.variable and self.value > other.value
+        return False
+    
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature >= self.value
+
+    @property
+    def operator(self) -> str:
+        return ">="
+
+class LessThanCondition(Condition):
+
+    def negate(self) -> Self:
+        return GreaterThanOrEqualCondition(self.variable, self.value)
+    
+    def contradicts(self, other: Condition) -> bool:
+        if isinstance(other, EqualsCondition):
+            return self.variable == other.variable and self.value <= other.value
+        if isinstance(other, GreaterThanCondition):
+            return self.variable == other.variable and self.value <= other.value
+        if isinstance(other, GreaterThanOrEqualCondition):
+            return self.variable == other.variable and self.value <= other.value
+        return False
+    
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature < self.value
+
+    @property
+    def operator(self) -> str:
+        return "<"
+
+class LessThanOrEqualCondition(Condition): 
+    
+    def negate(self) -> Self:
+        return GreaterThanCondition(self.variable, self.value)
+    
+    def contradicts(self, other: Condition) -> bool:
+        if isinstance(other, EqualsCondition):
+            return self.variable == other.variable and self.value < other.value
+        if isinstance(other, GreaterThanCondition):
+            return self.variable == other.variable and self.value <= other.value
+        if isinstance(other, GreaterThanOrEqualCondition):
+            return self.variable == other.variable and self.value < other.value
+        return False
+        
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature <= self.value
+
+    @property
+    def operator(self) -> str:
+        return "<="
+
+CONDITION_CLASSES = (
+    EqualsCondition, NotEqualsCondition, GreaterThanCondition, GreaterThanOrEqualCondition,
+    LessThanCondition, LessThanOrEqualCondition
+)
+
+@dataclass
+class Strategy:
+    conditions: frozenset[Condition]
+    value: float
+
+    def prune(self) -> Self | None:
+        from collections import defaultdict
+
+        grouped_conditions = defaultdict(list)
+
+        # O(n*m), find a better way to filter out contradictions
+        for condition in self.conditions:
+            if any(condition.contradicts(existing) for existing in grouped_conditions[condition.variable]):
+                return None
+            grouped_conditions[condition.variable].append(condition)
+        
+        simplified_conditions = []
+
+        # Putting the pruning logic on the condition object can make future evolutions easier (add new condition type, like contains, etc)
+        # But it would incrase the pruning overhead, since we would also need to put the priority logic in the condition object
+        for conditions in grouped_conditions.values():
+            track_equal_condition = None
+            track_not_equal_condition = []
+            tack_greater_than_condition = None
+            track_less_than_condition = None
+
+            for condition in conditions:
+                if isinstance(condition, (EqualsCondition)):
+                    track_equal_condition = condition
+                    break
+                elif isinstance(condition, NotEqualsCondition):
+                    track_not_equal_condition.append(condition)
+                elif isinstance(condition, (GreaterThanCondition, GreaterThanOrEqualCondition)):
+                    if tack_greater_than_condition is None or condition.value > tack_greater_than_condition.value or condition.value == tack_greater_than_condition.value:
+                        tack_greater_than_condition = condition
+                elif isinstance(condition, (LessThanCondition, LessThanOrEqualCondition)):
+                    if track_less_than_condition is None or condition.value < track_less_than_condition.value or condition.value == track_less_than_condition.value:
+                        track_less_than_condition = condition
+                else:
+                    raise TypeError(f"Cannot prune condition of type {type(condition)}")
+            
+            if track_equal_condition is not None:
+                simplified_conditions.append(track_equal_condition)
+                continue
+
+            if track_not_equal_condition:
+                simplified_conditions.extend(track_not_equal_condition)
+            if tack_greater_than_condition:
+                simplified_conditions.append(tack_greater_than_condition)
+            if track_less_than_condition:
+                simplified_conditions.append(track_less_than_condition)
+
+        return self.__class__(
+            conditions=frozenset(simplified_conditions),
+            value=self.value
+        )
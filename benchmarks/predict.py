@@ -0,0 +1,70 @@
+import argparse
+import random
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "src"))
+
+from strategy_tree import StrategyTree  # noqa: E402
+from tree_generator import generate_tree  # noqa: E402
+
+def random_tree(depth: int, variables: int, cardinality: int, or_fanout: int, seed: int) -> StrategyTree:
+    return generate_tree(
+        depth,
+        or_fanout=or_fanout,
+        variables=variables,
+        cardinality=cardinality,
+        operators={"=": 1, "!=": 1},
+        seed=seed
+    )
+
+def random_requests(count: int, variables: int, cardinality: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [{f"f{variable}": rng.randrange(cardinality) for variable in range(variables)} for _ in range(count)]
+
+def measure(predict, requests: list) -> float:
+    start = time.perf_counter()
+    for features in requests:
+        predict(features)
+    return len(requests) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares StrategyTree.predict with the compiled predict function")
+    parser.add_argument("--depth", type=int, default=14)
+    parser.add_argument("--variables", type=int, default=20)
+    parser.add_argument("--cardinality", type=int, default=10)
+    parser.add_argument("--or-fanout", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tree = random_tree(args.depth, args.variables, args.cardinality, args.or_fanout, args.seed)
+    requests = random_requests(args.requests, args.variables, args.cardinality, args.seed)
+
+    start = time.perf_counter()
+    compiled = tree.compile()
+    compile_time = time.perf_counter() - start
+
+    assert all(compiled(features) == tree.predict(features) for features in requests[:1000])
+
+    interpreted_rate = measure(tree.predict, requests)
+    compiled_rate = measure(compiled, requests)
+
+    print(f"compile time: {compile_time * 1000:.1f} ms")
+    print(f"interpreter:  {interpreted_rate:,.0f} predictions/s")
+    print(f"compiled:     {compiled_rate:,.0f} predictions/s ({compiled_rate / interpreted_rate:.1f}x)")
+
+    try:
+        import numpy as np
+    except ImportError:
+        return
+
+    columns = {variable: np.array([features[variable] for features in requests]) for variable in requests[0]}
+    start = time.perf_counter()
+    tree.predict_batch(columns)
+    batch_rate = len(requests) / (time.perf_counter() - start)
+    print(f"batch:        {batch_rate:,.0f} predictions/s ({batch_rate / interpreted_rate:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "src"))
+
+from result_cache import tool_version  # noqa: E402
+from strategy import Strategy  # noqa: E402
+from strategy_tree import ConditionNode, LeafNode, StrategyTree  # noqa: E402
+from tree_generator import generate  # noqa: E402
+
+TIERS = {
+    "small": {"depth": 8, "or_fanout": 2, "variables": 10, "cardinality": 5},
+    "medium": {"depth": 12, "or_fanout": 2, "variables": 20, "cardinality": 10},
+    "large": {"depth": 16, "or_fanout": 2, "variables": 40, "cardinality": 20},
+}
+RAW_PATHS = 50_000
+
+def raw_paths(tree: StrategyTree):
+    # Every root to leaf path with its conditions as written in the tree, contradictions included. The traversal
+    # simplifies paths while it walks, so these are what Strategy.prune would have to handle
+    negate = tree.condition_factory.negate
+    stack = [(tree.root, ())]
+
+    while stack:
+        node, conditions = stack.pop()
+        if isinstance(node, LeafNode):
+            yield Strategy(conditions=frozenset(conditions), value=node.value)
+        elif isinstance(node, ConditionNode):
+            stack.append((node.false_branch, conditions + tuple(map(negate, node.conditions))))
+            stack.extend((node.true_branch, conditions + (condition,)) for condition in node.conditions)
+
+def measure(phase, repeat: int) -> dict:
+    # Best wall time over `repeat` runs, then one more run under tracemalloc for the peak allocation,
+    # kept apart because tracing slows the timed runs down
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        phase()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    tracemalloc.start()
+    try:
+        phase()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_bytes": peak_bytes}
+
+def run_tier(parameters: dict, seed: int, repeat: int, directory: str) -> dict:
+    content = generate(seed=seed, **parameters)
+    tree = StrategyTree.from_string(content)
+    strategies = list(tree.get_strategies())
+    paths = list(islice(raw_paths(tree), RAW_PATHS))
+    output_path = path.join(directory, "strategies.txt")
+
+    phases = {
+        "parse": lambda: StrategyTree.from_string(content),
+        "get_strategies": tree.get_strategies,
+        "prune": lambda: [strategy.prune() for strategy in paths],
+        "write_strategies": lambda: tree.write_strategies(output_path),
+    }
+
+    return {
+        "parameters": {**parameters, "seed": seed},
+        "nodes": len(content.splitlines()),
+        "strategies": len(strategies),
+        "pruned_paths": len(paths),
+        "phases": {name: measure(phase, repeat) for name, phase in phases.items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Times parsing, extraction, pruning and writing on generated trees")
+    parser.add_argument("--tiers", type=str, default="small,medium", help=f"Comma separated tiers among {', '.join(TIERS)}")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=str, default=None, help="Path to the JSON report (default=stdout)")
+    args = parser.parse_args()
+
+    tiers = args.tiers.split(",")
+    unknown = set(tiers) - set(TIERS)
+    if unknown:
+        parser.error(f"unknown tiers: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        report = {
+            "version": tool_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tiers": {tier: run_tier(TIERS[tier], args.seed, args.repeat, directory) for tier in tiers},
+        }
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
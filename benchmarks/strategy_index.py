@@ -0,0 +1,74 @@
+import argparse
+import random
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "src"))
+
+from conditions import EqualsCondition  # noqa: E402
+from predict import random_requests, random_tree  # noqa: E402
+from strategy import Strategy  # noqa: E402
+from strategy_index import StrategyIndex  # noqa: E402
+
+def random_strategies(count: int, pinned: int, variables: int, cardinality: int, seed: int) -> list:
+    # Conjunctions of `pinned` = conditions on distinct variables, the workload of a large serving index
+    rng = random.Random(seed)
+    return [
+        Strategy(
+            conditions=frozenset(
+                EqualsCondition(f"f{variable}", rng.randrange(cardinality))
+                for variable in rng.sample(range(variables), pinned)
+            ),
+            value=float(strategy_id)
+        )
+        for strategy_id in range(count)
+    ]
+
+def linear_match(strategies: list, features: dict) -> list:
+    return [
+        strategy for strategy in strategies
+        if all(condition.evaluate(features) for condition in strategy.conditions)
+    ]
+
+def measure(match, requests: list) -> float:
+    start = time.perf_counter()
+    for features in requests:
+        match(features)
+    return len(requests) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares StrategyIndex lookups with a linear scan over strategies")
+    parser.add_argument("--depth", type=int, default=12)
+    parser.add_argument("--variables", type=int, default=20)
+    parser.add_argument("--cardinality", type=int, default=10)
+    parser.add_argument("--or-fanout", type=int, default=2)
+    parser.add_argument("--strategies", type=int, default=0, help="Index this many random conjunctions instead of a tree's strategies")
+    parser.add_argument("--pinned", type=int, default=6, help="Number of = conditions per random conjunction")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.strategies:
+        strategies = random_strategies(args.strategies, args.pinned, args.variables, args.cardinality, args.seed)
+    else:
+        tree = random_tree(args.depth, args.variables, args.cardinality, args.or_fanout, args.seed)
+        strategies = list(tree.get_strategies())
+    requests = random_requests(args.requests, args.variables, args.cardinality, args.seed)
+
+    start = time.perf_counter()
+    index = StrategyIndex.from_strategies(strategies)
+    build_time = time.perf_counter() - start
+
+    for features in requests[:100]:
+        assert sorted(map(id, index.match(features))) == sorted(map(id, linear_match(strategies, features)))
+
+    linear_rate = measure(lambda features: linear_match(strategies, features), requests)
+    index_rate = measure(index.match, requests)
+
+    print(f"strategies:  {len(strategies):,} (index built in {build_time * 1000:.1f} ms)")
+    print(f"linear scan: {linear_rate:,.0f} lookups/s")
+    print(f"index:       {index_rate:,.0f} lookups/s ({index_rate / linear_rate:.1f}x, {1e6 / index_rate:.1f} µs/lookup)")
+
+if __name__ == "__main__":
+    main()
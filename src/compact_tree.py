@@ -0,0 +1,232 @@
+from array import array
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Self, Set, Tuple
+
+from conditions import CONDITION_CLASSES, Condition
+from instrumentation import Stats
+from strategy import Strategy, deduplicate, extend_state, initial_state, minimize
+from strategy_tree import StrategyTree, TreeNode, LeafNode, ConditionNode
+
+NO_NODE = -1
+
+@dataclass
+class CompactStrategyTree:
+    # Struct of arrays, one slot per node, children are slot indexes (NO_NODE when missing)
+    root: int
+    ids: array = field(default_factory=lambda: array("q"))
+    true_branches: array = field(default_factory=lambda: array("q"))
+    false_branches: array = field(default_factory=lambda: array("q"))
+    leaf_values: array = field(default_factory=lambda: array("d"))
+    # Conditions of slot i are condition_*[condition_offsets[i]:condition_offsets[i + 1]], leaves have none
+    condition_offsets: array = field(default_factory=lambda: array("q", [0]))
+    condition_variables: array = field(default_factory=lambda: array("i"))
+    condition_operators: array = field(default_factory=lambda: array("b"))
+    condition_values: array = field(default_factory=lambda: array("i"))
+    variables: List[str] = field(default_factory=list)
+    values: List[int | float | str] = field(default_factory=list)
+    integral_variables: frozenset[str] = field(default=frozenset(), repr=False, compare=False)
+    stats: Stats | None = field(default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def is_leaf(self, slot: int) -> bool:
+        return self.condition_offsets[slot] == self.condition_offsets[slot + 1]
+
+    def condition(self, index: int) -> Condition:
+        return CONDITION_CLASSES[self.condition_operators[index]](
+            self.variables[self.condition_variables[index]],
+            self.values[self.condition_values[index]]
+        )
+
+    def iter_strategies(self, dedupe_window: int | None = 0, disjoint: bool = False) -> Iterator[Strategy]:
+        if dedupe_window != 0:
+            yield from deduplicate(self.iter_strategies(0, disjoint), dedupe_window, self.stats)
+            return
+
+        stats = self.stats
+
+        # Condition codes are (index << 1) | negated, each is decoded once per traversal
+        decoded = {}
+
+        def decode(code: int) -> Condition:
+            condition = decoded.get(code)
+            if condition is None:
+                condition = self.condition(code >> 1)
+                if code & 1:
+                    condition = condition.negate()
+                decoded[code] = condition
+            return condition
+
+        stack = [(self.root, initial_state(self.integral_variables))]
+
+        while stack:
+            slot, state = stack.pop()
+            if slot == NO_NODE:
+                continue
+
+            start, end = self.condition_offsets[slot], self.condition_offsets[slot + 1]
+            if start == end:
+                if stats is not None:
+                    stats.prune_calls += 1
+                yield Strategy.from_state(state, self.leaf_values[slot])
+                continue
+
+            # Branches whose path became unsatisfiable are dropped with their whole subtree. In disjoint mode
+            # each disjunct is taken on top of the negations of the previous ones, as in StrategyTree
+            pushed = len(stack)
+            false_state = state
+            for index in range(start, end):
+                true_state = extend_state(false_state if disjoint else state, (decode(index << 1),))
+                if true_state is not None:
+                    stack.append((self.true_branches[slot], true_state))
+
+                if false_state is not None:
+                    false_state = extend_state(false_state, (decode((index << 1) | 1),))
+                if false_state is None and disjoint:
+                    break
+
+            if false_state is not None:
+                stack.append((self.false_branches[slot], false_state))
+
+            if stats is not None:
+                # One branch per disjunct plus the false one, as counted by StrategyTree
+                pushed = len(stack) - pushed
+                stats.paths_explored += pushed
+                stats.paths_killed += end - start + 1 - pushed
+
+    def get_strategies(self, disjoint: bool = False) -> Set[Strategy]:
+        return set(self.iter_strategies(disjoint=disjoint))
+
+    def write_strategies(
+        self,
+        output_file_path: str,
+        dedupe_window: int | None = None,
+        minimize_passes: int = 0,
+        disjoint: bool = False,
+        output_format: str = "text",
+        sort_chunk_size: int = 0
+    ) -> None:
+        import strategy_io
+
+        stats = self.stats
+        strategies = self.iter_strategies(dedupe_window, disjoint)
+        if stats is not None:
+            strategies = stats.timed(strategies, "traverse")
+
+        if minimize_passes:
+            with stats.phase("minimize") if stats is not None else nullcontext():
+                strategies = minimize(strategies, minimize_passes)
+
+        if stats is None:
+            strategy_io.write(strategies, output_file_path, output_format, sort_chunk_size)
+            return
+
+        with stats.phase("write"):
+            strategy_io.write(
+                stats.count(strategies, "strategies_written"), output_file_path, output_format, sort_chunk_size
+            )
+
+    def conditions(self, slot: int) -> List[Condition]:
+        start, end = self.condition_offsets[slot], self.condition_offsets[slot + 1]
+        return [self.condition(index) for index in range(start, end)]
+
+    def iter_nodes(self) -> Iterator[TreeNode]:
+        # Unlinked, branches hold the child ids as from StrategyTree.iter_nodes
+        for slot in range(len(self)):
+            if self.is_leaf(slot):
+                yield LeafNode(self.ids[slot], self.leaf_values[slot])
+            else:
+                yield ConditionNode(
+                    self.ids[slot],
+                    self.conditions(slot),
+                    self._child_id(self.true_branches[slot]),
+                    self._child_id(self.false_branches[slot])
+                )
+
+    def to_tree(self) -> StrategyTree:
+        tree = StrategyTree.from_nodes(self.iter_nodes())
+        tree.integral_variables = self.integral_variables
+        return tree
+
+    def _child_id(self, slot: int) -> int | None:
+        return None if slot == NO_NODE else self.ids[slot]
+
+    @classmethod
+    def from_nodes(cls, nodes: Iterable[TreeNode]) -> Self:
+        tree = cls(root=NO_NODE)
+        slots: Dict[int, int] = {}
+        variable_ids: Dict[str, int] = {}
+        # Keyed by type as well, 5 and 5.0 are different values that print differently
+        value_ids: Dict[Tuple[type, int | float | str], int] = {}
+
+        def child_id(child: TreeNode | int | None) -> int:
+            if child is None:
+                return NO_NODE
+            return child.id if isinstance(child, TreeNode) else child
+
+        for node in nodes:
+            slots[node.id] = len(tree.ids)
+            tree.ids.append(node.id)
+
+            if isinstance(node, ConditionNode):
+                tree.leaf_values.append(0.0)
+                tree.true_branches.append(child_id(node.true_branch))
+                tree.false_branches.append(child_id(node.false_branch))
+
+                for condition in node.conditions:
+                    tree.condition_variables.append(variable_ids.setdefault(condition.variable, len(variable_ids)))
+                    tree.condition_operators.append(condition.opcode)
+                    tree.condition_values.append(value_ids.setdefault((type(condition.value), condition.value), len(value_ids)))
+            else:
+                tree.leaf_values.append(node.value)
+                tree.true_branches.append(NO_NODE)
+                tree.false_branches.append(NO_NODE)
+
+            tree.condition_offsets.append(len(tree.condition_variables))
+
+        # Branches were recorded as node ids, resolve them to slots now that every node is known
+        for branches in (tree.true_branches, tree.false_branches):
+            for slot, node_id in enumerate(branches):
+                if node_id != NO_NODE:
+                    branches[slot] = slots.get(node_id, NO_NODE)
+
+        tree.root = slots[0]
+        tree.variables = list(variable_ids)
+        tree.values = [value for _, value in value_ids]
+        return tree
+
+    @classmethod
+    def from_tree(cls, tree: StrategyTree) -> Self:
+        def walk(root: TreeNode):
+            stack, seen = [root], set()
+            while stack:
+                node = stack.pop()
+                if node is None or node.id in seen:
+                    continue
+                seen.add(node.id)
+                yield node
+                if isinstance(node, ConditionNode):
+                    stack.extend((node.false_branch, node.true_branch))
+
+        compact_tree = cls.from_nodes(walk(tree.root))
+        compact_tree.integral_variables = tree.integral_variables
+        return compact_tree
+
+    @classmethod
+    def from_string(cls, content: str) -> Self:
+        return cls.from_nodes(StrategyTree.iter_nodes(content.splitlines()))
+
+    @classmethod
+    def from_file(cls, file_path: str, use_mmap: bool = False, stats: Stats | None = None) -> Self:
+        # stats only counts the parsed nodes, the tree is returned without it so that it can be cached as is
+        if use_mmap:
+            return cls._from_parsed_nodes(StrategyTree.iter_nodes_mmap(file_path), stats)
+
+        with open(file_path, 'r') as file:
+            return cls._from_parsed_nodes(StrategyTree.iter_nodes(file), stats)
+
+    @classmethod
+    def _from_parsed_nodes(cls, nodes: Iterable[TreeNode], stats: Stats | None) -> Self:
+        return cls.from_nodes(nodes if stats is None else stats.count(nodes, "nodes_parsed"))
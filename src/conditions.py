@@ -1,142 +1,170 @@
-from dataclasses import dataclass
+import operator
+import sys
+from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
-from typing import Self
+from typing import Callable, ClassVar, Dict, Mapping, Self, Tuple, Type
 
-@dataclass
+# Integer operator codes, positions in OPERATORS. CompactStrategyTree and the binary output store them as is
+EQ, NE, GT, GE, LT, LE = range(6)
+OPERATORS = ("=", "!=", ">", ">=", "<", "<=")
+
+# NEGATIONS[op] is the operator of the negated condition
+NEGATIONS = (NE, EQ, LE, LT, GE, GT)
+
+# CONTRADICTIONS[self op][other op](self.value, other.value) tells whether two conditions on the same variable
+# cannot hold together, None when they never contradict
+_ContradictionCheck = Callable[[int | str, int | str], bool] | None
+CONTRADICTIONS: Tuple[Tuple[_ContradictionCheck, ...], ...] = (
+    # =                 !=           >            >=           <            <=
+    (operator.ne,       operator.eq, operator.le, operator.lt, operator.ge, operator.gt),  # =
+    (operator.eq,       None,        None,        None,        None,        None),         # !=
+    (operator.ge,       None,        None,        None,        operator.ge, operator.ge),  # >
+    (operator.gt,       None,        None,        None,        operator.ge, operator.gt),  # >=
+    (operator.le,       None,        operator.le, operator.le, None,        None),         # <
+    (operator.lt,       None,        operator.le, operator.lt, None,        None),         # <=
+)
+
+@dataclass(slots=True, eq=False)
 class Condition(ABC):
     variable: str
     value: int | str
+    _hash: int = field(init=False, repr=False)
 
-    @property
-    @abstractmethod
-    def operator(self) -> str:
-        raise NotImplementedError(f"{self.__class__.__name__}.operator not implemented")
-    
-    @abstractmethod
-    def negate(self) -> Self:
-        raise NotImplementedError(f"{self.__class__.__name__}.negate not implemented")
+    opcode: ClassVar[int]
+    operator: ClassVar[str]
+
+    def __post_init__(self):
+        # Conditions end up in many frozensets, hash them once
+        self._hash = hash((self.opcode, self.variable, self.value))
+
+    def negate(self) -> "Condition":
+        return CONDITION_CLASSES[NEGATIONS[self.opcode]](self.variable, self.value)
 
-    @abstractmethod
     def contradicts(self, other: "Condition") -> bool:
-        raise NotImplementedError(f"{self.__class__.__name__}.contradicts not implemented")
+        check = CONTRADICTIONS[self.opcode][other.opcode]
+        return check is not None and self.variable == other.variable and check(self.value, other.value)
+
+    # A missing (or None) feature only satisfies !=
+    @abstractmethod
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        raise NotImplementedError(f"{self.__class__.__name__}.evaluate not implemented")
     
     def __str__(self) -> str:
         return f"{self.variable}{self.operator}{self.value}"
     
     def __eq__(self, other: Self) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, Condition):
             return False
-        return self.variable == other.variable and self.value == other.value and self.operator == other.operator
+        return (
+            self._hash == other._hash and
+            self.opcode == other.opcode and
+            self.variable == other.variable and
+            self.value == other.value
+        )
     
     def __hash__(self):
-        return hash(self.variable) + hash(self.value) + hash(self.operator)
+        return self._hash
+
+    def __reduce__(self):
+        # String hashes are salted per process, rebuild through __init__ so the cached hash is recomputed
+        return self.__class__, (self.variable, self.value)
 
 class EqualsCondition(Condition):
+    __slots__ = ()
+    opcode = EQ
+    operator = "="
 
-    def negate(self) -> Self:
-        return NotEqualsCondition(self.variable, self.value)
-    
-    def contradicts(self, other: Condition) -> bool:
-        if isinstance(other, EqualsCondition):
-            return self.variable == other.variable and self.value != other.value
-        elif isinstance(other, NotEqualsCondition):
-            return self.variable == other.variable and self.value == other.value
-        elif isinstance(other, GreaterThanCondition):
-            return self.variable == other.variable and self.value <= other.value
-        elif isinstance(other, GreaterThanOrEqualCondition):
-            return self.variable == other.variable and self.value < other.value
-        elif isinstance(other, LessThanCondition):
-            return self.variable == other.variable and self.value >= other.value
-        elif isinstance(other, LessThanOrEqualCondition):
-            return self.variable == other.variable and self.value > other.value
-        return False
-        
-    @property
-    def operator(self) -> str:
-        return "="
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        return features.get(self.variable) == self.value
 
 class NotEqualsCondition(Condition):
+    __slots__ = ()
+    opcode = NE
+    operator = "!="
+
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        return features.get(self.variable) != self.value
 
-    def negate(self) -> Self:
-        return EqualsCondition(self.variable, self.value)
-    
-    def contradicts(self, other: Condition) -> bool:
-        if isinstance(other, EqualsCondition):
-            return self.variable == other.variable and self.value == other.value
-        return False
-    
-    @property
-    def operator(self) -> str:
-        return "!="
-    
 class GreaterThanCondition(Condition):
+    __slots__ = ()
+    opcode = GT
+    operator = ">"
 
-    def negate(self) -> Self:
-        return LessThanOrEqualCondition(self.variable, self.value)
-    
-    def contradicts(self, other: Condition) -> bool:
-        if isinstance(other, EqualsCondition):
-            return self.variable == other.variable and self.value >= other.value
-        if isinstance(other, LessThanCondition):
-            return self.variable == other.variable and self.value >= other.value
-        if isinstance(other, LessThanOrEqualCondition):
-            return self.variable == other.variable and self.value >= other.value
-        return False
-        
-    @property
-    def operator(self) -> str:
-        return ">"
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature > self.value
 
 class GreaterThanOrEqualCondition(Condition):
-   
-    def negate(self) -> Self:
-        return LessThanCondition(self.variable, self.value)
-    
-    def contradicts(self, other: Condition) -> bool:
-        if isinstance(other, EqualsCondition):
-            return self.variable == other.variable and self.value > other.value
-        if isinstance(other, LessThanCondition):
-            return self.variable == other.variable and self.value > other.value
-        if isinstance(other, LessThanOrEqualCondition):
-            return self.variable == other.variable and self.value > other.value
-        return False
-    
-    @property
-    def operator(self) -> str:
-        return ">="
+    __slots__ = ()
+    opcode = GE
+    operator = ">="
+
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature >= self.value
 
 class LessThanCondition(Condition):
+    __slots__ = ()
+    opcode = LT
+    operator = "<"
 
-    def negate(self) -> Self:
-        return GreaterThanOrEqualCondition(self.variable, self.value)
-    
-    def contradicts(self, other: Condition) -> bool:
-        if isinstance(other, EqualsCondition):
-            return self.variable == other.variable and self.value <= other.value
-        if isinstance(other, GreaterThanCondition):
-            return self.variable == other.variable and self.value <= other.value
-        if isinstance(other, GreaterThanOrEqualCondition):
-            return self.variable == other.variable and self.value <= other.value
-        return False
-    
-    @property
-    def operator(self) -> str:
-        return "<"
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature < self.value
 
-class LessThanOrEqualCondition(Condition): 
-    
-    def negate(self) -> Self:
-        return GreaterThanCondition(self.variable, self.value)
-    
-    def contradicts(self, other: Condition) -> bool:
-        if isinstance(other, EqualsCondition):
-            return self.variable == other.variable and self.value < other.value
-        if isinstance(other, GreaterThanCondition):
-            return self.variable == other.variable and self.value <= other.value
-        if isinstance(other, GreaterThanOrEqualCondition):
-            return self.variable == other.variable and self.value < other.value
-        return False
-        
-    @property
-    def operator(self) -> str:
-        return "<="
+class LessThanOrEqualCondition(Condition):
+    __slots__ = ()
+    opcode = LE
+    operator = "<="
+
+    def evaluate(self, features: Mapping[str, int | str]) -> bool:
+        feature = features.get(self.variable)
+        return feature is not None and feature <= self.value
+
+# Indexed by opcode
+CONDITION_CLASSES: Tuple[Type[Condition], ...] = (
+    EqualsCondition, NotEqualsCondition,
+    GreaterThanCondition, GreaterThanOrEqualCondition,
+    LessThanCondition, LessThanOrEqualCondition
+)
+
+class ConditionFactory:
+    # Flyweight cache returning one shared instance per (class, variable, value), with memoized negations.
+    # Keys hold the value type too, 5 and 5.0 compare equal but print differently
+
+    def __init__(self):
+        self._conditions: Dict[Tuple[Type[Condition], str, type, int | float | str], Condition] = {}
+        self._negations: Dict[Tuple[Type[Condition], str, type, int | float | str], Condition] = {}
+
+    def __len__(self) -> int:
+        return len(self._conditions)
+
+    def create(self, condition_class: Type[Condition], variable: str, value: int | float | str) -> Condition:
+        key = (condition_class, variable, type(value), value)
+        condition = self._conditions.get(key)
+
+        if condition is None:
+            variable = sys.intern(variable)
+            if isinstance(value, str):
+                value = sys.intern(value)
+            condition = self._conditions[key] = condition_class(variable, value)
+
+        return condition
+
+    def intern(self, condition: Condition) -> Condition:
+        return self.create(condition.__class__, condition.variable, condition.value)
+
+    def negate(self, condition: Condition) -> Condition:
+        key = (condition.__class__, condition.variable, type(condition.value), condition.value)
+        negation = self._negations.get(key)
+
+        if negation is None:
+            negation = self.intern(condition.negate())
+            self._negations[key] = negation
+            self._negations[(negation.__class__, negation.variable, type(negation.value), negation.value)] = (
+                self.intern(condition)
+            )
+
+        return negation
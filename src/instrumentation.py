@@ -0,0 +1,97 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+COUNTERS = (
+    "nodes_parsed", "paths_explored", "paths_killed", "prune_calls", "strategies_deduplicated", "strategies_written"
+)
+
+def peak_memory() -> int:
+    # Peak resident set size of the process in bytes, 0 where the resource module is missing
+    try:
+        import resource
+        import sys
+    except ImportError:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+_EXHAUSTED = object()
+
+@dataclass
+class Stats:
+    # Counters are bumped by StrategyTree while it parses and traverses, phases hold the wall time spent in each
+    # phase excluding the nested ones. callback(phase, stats) is called whenever a phase ends
+    nodes_parsed: int = 0
+    paths_explored: int = 0
+    paths_killed: int = 0
+    prune_calls: int = 0
+    strategies_deduplicated: int = 0
+    strategies_written: int = 0
+    phases: Dict[str, float] = field(default_factory=dict)
+    peak_memory: int = 0
+    callback: Callable[[str, "Stats"], None] | None = field(default=None, repr=False, compare=False)
+    _nested: List[float] = field(default_factory=list, repr=False, compare=False)
+
+    @contextmanager
+    def phase(self, name: str, notify: bool = True) -> Iterator[None]:
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+
+            if notify:
+                self.peak_memory = max(self.peak_memory, peak_memory())
+                if self.callback is not None:
+                    self.callback(name, self)
+
+    def timed(self, items: Iterable[Any], name: str) -> Iterator[Any]:
+        # Charges the time spent producing each item to the phase, e.g. traversal interleaved with writing
+        iterator = iter(items)
+        while True:
+            with self.phase(name, notify=False):
+                item = next(iterator, _EXHAUSTED)
+            if item is _EXHAUSTED:
+                break
+            yield item
+
+        self.peak_memory = max(self.peak_memory, peak_memory())
+        if self.callback is not None:
+            self.callback(name, self)
+
+    def count(self, items: Iterable[Any], counter: str) -> Iterator[Any]:
+        for item in items:
+            setattr(self, counter, getattr(self, counter) + 1)
+            yield item
+
+    def merge(self, other: "Stats") -> None:
+        for counter in COUNTERS:
+            setattr(self, counter, getattr(self, counter) + getattr(other, counter))
+
+    def counters(self) -> Dict[str, int]:
+        return {counter: getattr(self, counter) for counter in COUNTERS}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self.counters(), "phases": dict(self.phases), "peak_memory": self.peak_memory}
+
+    def __getstate__(self):
+        # Shipped back from worker processes, the callback stays in the parent
+        return {item.name: getattr(self, item.name) for item in fields(self) if item.name not in ("callback", "_nested")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, callback=None, _nested=[])
+
+    def __str__(self) -> str:
+        width = max(map(len, (*COUNTERS, *self.phases)))
+        lines = [f"{counter:<{width}}  {value:>14,}" for counter, value in self.counters().items()]
+        lines.extend(f"{name:<{width}}  {seconds:>13.3f}s" for name, seconds in self.phases.items())
+        lines.append(f"{'peak_memory':<{width}}  {self.peak_memory / (1 << 20):>11.1f} MB")
+        return "\n".join(lines)
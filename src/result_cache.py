@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pickle
+import shutil
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+from compact_tree import CompactStrategyTree
+
+CACHE_SIZE = 1 << 30
+READ_CHUNK_SIZE = 1 << 20
+# Bumped whenever the layout of the cached entries changes
+CACHE_FORMAT = 2
+
+def tool_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("dv-test")
+    except PackageNotFoundError:
+        return "0.0.0"
+
+@dataclass
+class ResultCache:
+    # Content addressed: entries are named after the SHA-256 of the input file, the tool version and the options
+    # that change the output, so identical invocations share them. Least recently used entries (by mtime, refreshed
+    # on every hit) are evicted once the directory grows over max_size bytes
+    directory: str
+    max_size: int = CACHE_SIZE
+    _file_digests: Dict[str, str] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+    def file_digest(self, file_path: str) -> str:
+        digest = self._file_digests.get(file_path)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(file_path, 'rb') as file:
+                while chunk := file.read(READ_CHUNK_SIZE):
+                    sha.update(chunk)
+            digest = self._file_digests[file_path] = sha.hexdigest()
+        return digest
+
+    def key(self, file_path: str, **options: Any) -> str:
+        sha = hashlib.sha256(f"{self.file_digest(file_path)}:{tool_version()}:{CACHE_FORMAT}".encode())
+        for name, value in sorted(options.items()):
+            sha.update(f":{name}={value!r}".encode())
+        return sha.hexdigest()
+
+    def _path(self, key: str, extension: str) -> str:
+        return os.path.join(self.directory, f"{key}{extension}")
+
+    def _hit(self, path: str) -> bool:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _store(self, path: str, write: Callable[[str], None]) -> None:
+        # Written next to the entry then renamed, concurrent jobs never see a partial entry
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            write(temporary_path)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        self.evict()
+
+    def load_tree(self, file_path: str, parse: Callable[[], CompactStrategyTree]) -> CompactStrategyTree:
+        path = self._path(self.key(file_path), ".tree")
+
+        if self._hit(path):
+            with open(path, 'rb') as file:
+                return pickle.load(file)
+
+        tree = parse()
+
+        def write(temporary_path: str) -> None:
+            with open(temporary_path, 'wb') as file:
+                pickle.dump(tree, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._store(path, write)
+        return tree
+
+    def restore_output(self, key: str, output_file_path: str) -> bool:
+        path = self._path(key, ".out")
+        if not self._hit(path):
+            return False
+
+        shutil.copyfile(path, output_file_path)
+        return True
+
+    def store_output(self, key: str, output_file_path: str) -> None:
+        self._store(self._path(key, ".out"), lambda temporary_path: shutil.copyfile(output_file_path, temporary_path))
+
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
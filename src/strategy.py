@@ -1,11 +1,11 @@
 from dataclasses import dataclass
-from conditions import (
-    Condition,
-    EqualsCondition, NotEqualsCondition,
-    GreaterThanOrEqualCondition, GreaterThanCondition,
-    LessThanOrEqualCondition, LessThanCondition
-)
-from typing import Self
+from conditions import CONDITION_CLASSES, CONTRADICTIONS, Condition, EQ, NE, GT, GE, LT, LE
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Self, Set
+
+if TYPE_CHECKING:
+    from instrumentation import Stats
+
+MINIMIZE_PASSES = 8
 
 @dataclass
 class Strategy:
@@ -13,7 +13,10 @@ class Strategy:
     value: float
 
     def __str__(self) -> str:
-        conditions=" && ".join([str(st) for st in self.conditions])
+        return self.format(self.conditions)
+
+    def format(self, conditions: Iterable[Condition]) -> str:
+        conditions=" && ".join([str(st) for st in conditions])
         return f"if ({conditions}) then {self.value}"
     
     def __eq__(self, other: object) -> bool:
@@ -27,54 +30,252 @@ class Strategy:
     def __hash__(self):
         return hash(self.conditions) + hash(self.value)
     
-    def prune(self) -> Self | None:
-        from collections import defaultdict
+    def prune(self, integral_variables: Iterable[str] = ()) -> Self | None:
+        state = extend_state(initial_state(integral_variables), self.conditions)
+        if state is None:
+            return None
+        return self.from_state(state, self.value)
+
+    @classmethod
+    def from_state(cls, state: "PathState", value: float) -> Self:
+        return cls(
+            conditions=frozenset(condition for domain in state.values() for condition in domain.conditions()),
+            value=value
+        )
+
+class VariableDomain:
+    # Values still allowed for one variable: a pinned value, or excluded values between two bounds.
+    # Instances are immutable, add() returns the narrowed domain, itself when redundant, None when empty.
+    # An integral domain only takes integer values, so x>5 && x<6 is empty and x>=5 && x<7 && x!=6 is x=5
+    __slots__ = ("equal", "excluded", "lower", "upper", "integral")
+
+    def __init__(
+        self,
+        equal: Condition | None = None,
+        excluded: frozenset[Condition] = frozenset(),
+        lower: Condition | None = None,
+        upper: Condition | None = None,
+        integral: bool = False
+    ):
+        self.equal = equal
+        self.excluded = excluded
+        self.lower = lower
+        self.upper = upper
+        self.integral = integral
+
+    def add(self, condition: Condition) -> Self | None:
+        if self.equal is not None:
+            return None if self.equal.contradicts(condition) or condition.contradicts(self.equal) else self
 
-        grouped_conditions = defaultdict(list)
+        opcode = condition.opcode
 
-        # O(n*m), find a better way to filter out contradictions
-        for condition in self.conditions:
-            if any(condition.contradicts(existing) for existing in grouped_conditions[condition.variable]):
+        if opcode == EQ:
+            if any(excluded.value == condition.value for excluded in self.excluded):
                 return None
-            grouped_conditions[condition.variable].append(condition)
-        
-        simplified_conditions = []
-
-        # Putting the pruning logic on the condition object can make future evolutions easier (add new condition type, like contains, etc)
-        # But it would incrase the pruning overhead, since we would also need to put the priority logic in the condition object
-        for conditions in grouped_conditions.values():
-            track_equal_condition = None
-            track_not_equal_condition = []
-            tack_greater_than_condition = None
-            track_less_than_condition = None
-
-            for condition in conditions:
-                if isinstance(condition, (EqualsCondition)):
-                    track_equal_condition = condition
-                    break
-                elif isinstance(condition, NotEqualsCondition):
-                    track_not_equal_condition.append(condition)
-                elif isinstance(condition, (GreaterThanCondition, GreaterThanOrEqualCondition)):
-                    if tack_greater_than_condition is None or condition.value > tack_greater_than_condition.value or condition.value == tack_greater_than_condition.value:
-                        tack_greater_than_condition = condition
-                elif isinstance(condition, (LessThanCondition, LessThanOrEqualCondition)):
-                    if track_less_than_condition is None or condition.value < track_less_than_condition.value or condition.value == track_less_than_condition.value:
-                        track_less_than_condition = condition
-                else:
-                    raise TypeError(f"Cannot prune condition of type {type(condition)}")
-            
-            if track_equal_condition is not None:
-                simplified_conditions.append(track_equal_condition)
+            for bound in (self.lower, self.upper):
+                if bound is not None and bound.contradicts(condition):
+                    return None
+            # A pinned value makes every other condition on the variable redundant
+            return VariableDomain(equal=condition, integral=self.integral)
+
+        if opcode == NE:
+            # Values outside the bounds are already excluded by them
+            if condition in self.excluded or not self._admits(condition.value, self.lower, self.upper):
+                return self
+            return self._narrow(self.excluded | {condition}, self.lower, self.upper)
+
+        if opcode == GT or opcode == GE:
+            if self.upper is not None and (condition.contradicts(self.upper) or self.upper.contradicts(condition)):
+                return None
+            if self.lower is not None and not self._is_tighter(condition, self.lower):
+                return self
+            return self._narrow(self.excluded, condition, self.upper)
+
+        if opcode == LT or opcode == LE:
+            if self.lower is not None and (condition.contradicts(self.lower) or self.lower.contradicts(condition)):
+                return None
+            if self.upper is not None and not self._is_tighter(condition, self.upper):
+                return self
+            return self._narrow(self.excluded, self.lower, condition)
+
+        raise TypeError(f"Cannot prune condition of type {type(condition)}")
+
+    def _narrow(
+        self, excluded: frozenset[Condition], lower: Condition | None, upper: Condition | None
+    ) -> Self | None:
+        if lower is not None or upper is not None:
+            excluded = frozenset(condition for condition in excluded if self._admits(condition.value, lower, upper))
+        if lower is None or upper is None:
+            return VariableDomain(excluded=excluded, lower=lower, upper=upper, integral=self.integral)
+
+        # x>=5 && x<=5 is x=5
+        if lower.opcode == GE and upper.opcode == LE and lower.value == upper.value:
+            return self._pin(lower.variable, lower.value, excluded)
+
+        if self.integral and _is_int(lower.value) and _is_int(upper.value):
+            low = lower.value + 1 if lower.opcode == GT else lower.value
+            high = upper.value - 1 if upper.opcode == LT else upper.value
+            excluded_values = {condition.value for condition in excluded if _is_int(condition.value)}
+            remaining = high - low + 1 - len(excluded_values)
+            if remaining <= 0:
+                return None
+            if remaining == 1:
+                value = next(value for value in range(low, high + 1) if value not in excluded_values)
+                return self._pin(lower.variable, value, excluded)
+
+        return VariableDomain(excluded=excluded, lower=lower, upper=upper, integral=self.integral)
+
+    def _pin(self, variable: str, value: Any, excluded: frozenset[Condition]) -> Self | None:
+        if any(condition.value == value for condition in excluded):
+            return None
+        return VariableDomain(equal=CONDITION_CLASSES[EQ](variable, value), integral=self.integral)
+
+    @staticmethod
+    def _admits(value: Any, lower: Condition | None, upper: Condition | None) -> bool:
+        # Whether value lies within the bounds, values of another type than a bound are kept
+        for bound in (lower, upper):
+            if bound is None:
                 continue
+            try:
+                if CONTRADICTIONS[bound.opcode][EQ](bound.value, value):
+                    return False
+            except TypeError:
+                pass
+        return True
+
+    @staticmethod
+    def _is_tighter(bound: Condition, current: Condition) -> bool:
+        # Strict bounds win ties, x>5 is tighter than x>=5
+        if bound.value == current.value:
+            return (bound.opcode == GT or bound.opcode == LT) and bound.opcode != current.opcode
+        if bound.opcode == GT or bound.opcode == GE:
+            return bound.value > current.value
+        return bound.value < current.value
+
+    def conditions(self) -> list[Condition]:
+        if self.equal is not None:
+            return [self.equal]
+
+        conditions = list(self.excluded)
+        if self.lower is not None:
+            conditions.append(self.lower)
+        if self.upper is not None:
+            conditions.append(self.upper)
+        return conditions
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, VariableDomain):
+            return False
+        return (
+            self.equal == other.equal and
+            self.excluded == other.excluded and
+            self.lower == other.lower and
+            self.upper == other.upper and
+            self.integral == other.integral
+        )
+
+    def __hash__(self):
+        return hash((self.equal, self.excluded, self.lower, self.upper, self.integral))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({' && '.join(map(str, self.conditions()))})"
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+EMPTY_DOMAIN = VariableDomain()
+INTEGRAL_DOMAIN = VariableDomain(integral=True)
+
+# Path constraints keyed by variable, never mutated once built so that sibling branches can share them
+PathState = Dict[str, VariableDomain]
+
+def initial_state(integral_variables: Iterable[str] = ()) -> PathState:
+    return {variable: INTEGRAL_DOMAIN for variable in integral_variables}
+
+def extend_state(state: PathState, conditions: Iterable[Condition]) -> PathState | None:
+    extended = None
+
+    for condition in conditions:
+        domain = (extended or state).get(condition.variable, EMPTY_DOMAIN)
+        narrowed = domain.add(condition)
+        if narrowed is None:
+            return None
+        if narrowed is not domain:
+            if extended is None:
+                extended = dict(state)
+            extended[condition.variable] = narrowed
+
+    return state if extended is None else extended
+
+def deduplicate(
+    strategies: Iterable[Strategy], window: int | None = None, stats: "Stats | None" = None
+) -> Iterator[Strategy]:
+    # window=None remembers every strategy, otherwise only the `window` most recently seen ones
+    if window is None:
+        seen = set()
+        for strategy in strategies:
+            if strategy not in seen:
+                seen.add(strategy)
+                yield strategy
+            elif stats is not None:
+                stats.strategies_deduplicated += 1
+        return
+
+    from collections import OrderedDict
+
+    recent = OrderedDict()
+    for strategy in strategies:
+        if strategy in recent:
+            recent.move_to_end(strategy)
+            if stats is not None:
+                stats.strategies_deduplicated += 1
+            continue
+
+        recent[strategy] = None
+        if len(recent) > window:
+            recent.popitem(last=False)
+        yield strategy
+
+def minimize(strategies: Iterable[Strategy], max_passes: int = MINIMIZE_PASSES) -> Set[Strategy]:
+    # Merges pairs of strategies with the same value whose union is still a conjunction, so the set covers the same
+    # requests with the same values in fewer rules:
+    #   R & c      +  R & not c       ->  R
+    #   R & x!=v & x!=w  +  R & x=v   ->  R & x!=w
+    # Each pass is linear in the number of conditions, the loop stops at a fixed point or after max_passes
+    strategies = set(strategies)
+
+    for _ in range(max_passes):
+        merged = _merge_pass(strategies)
+        if merged == strategies:
+            break
+        strategies = merged
+
+    return strategies
+
+def _merge_pass(strategies: Set[Strategy]) -> Set[Strategy]:
+    removed, merged = set(), set()
+
+    for strategy in strategies:
+        if strategy in removed:
+            continue
+
+        for condition in strategy.conditions:
+            rest = strategy.conditions - {condition}
+
+            partner = Strategy(conditions=rest | {condition.negate()}, value=strategy.value)
+            if partner not in strategies and condition.opcode == NE:
+                # R & x=v is only covered by the merge when v satisfies the remaining conditions on x
+                pinned = {condition.variable: condition.value}
+                same_variable = [other for other in rest if other.variable == condition.variable]
+                if all(other.evaluate(pinned) for other in same_variable):
+                    partner = Strategy(
+                        conditions=rest.difference(same_variable) | {condition.negate()},
+                        value=strategy.value
+                    )
+
+            if partner in strategies:
+                removed.update((strategy, partner))
+                merged.add(Strategy(conditions=rest, value=strategy.value))
+                break
 
-            if track_not_equal_condition:
-                simplified_conditions.extend(track_not_equal_condition)
-            if tack_greater_than_condition:
-                simplified_conditions.append(tack_greater_than_condition)
-            if track_less_than_condition:
-                simplified_conditions.append(track_less_than_condition)
-
-        return self.__class__(
-            conditions=frozenset(simplified_conditions),
-            value=self.value
-        )
\ No newline at end of file
+    return (strategies - removed) | merged
@@ -0,0 +1,134 @@
+import argparse
+import glob
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from os import path
+from typing import Any, Dict, List, Tuple
+
+from instrumentation import Stats
+from strategy_io import OUTPUT_EXTENSIONS
+
+@dataclass
+class FileResult:
+    input_path: str
+    output_path: str
+    seconds: float = 0.0
+    error: str | None = None
+    stats: Stats | None = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        result = {"input": self.input_path, "output": self.output_path, "seconds": self.seconds, "error": self.error}
+        if self.stats is not None:
+            result["stats"] = self.stats.as_dict()
+        return result
+
+@dataclass
+class BatchReport:
+    results: List[FileResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def failures(self) -> List[FileResult]:
+        return [result for result in self.results if result.error is not None]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files": len(self.results),
+            "failed": len(self.failures),
+            "seconds": self.seconds,
+            "results": [result.as_dict() for result in self.results],
+        }
+
+    def __str__(self) -> str:
+        lines = [
+            f"{'FAILED' if result.error else 'ok':<6}  {result.seconds:>9.3f}s  {result.input_path}"
+            + (f"  ({result.error})" if result.error else "")
+            for result in self.results
+        ]
+        lines.append(f"{len(self.results)} files, {len(self.failures)} failed in {self.seconds:.3f}s")
+        return "\n".join(lines)
+
+def is_batch_input(file_path: str) -> bool:
+    # An existing file is taken as is, even when its name looks like a glob (model[1].txt)
+    if path.isfile(file_path):
+        return False
+    return path.isdir(file_path) or any(character in file_path for character in "*?[")
+
+def resolve_inputs(file_path: str | None = None, manifest_path: str | None = None) -> List[str]:
+    # A directory gives its files (hidden ones left out), a glob its matching files, a manifest one path per line
+    # with blank lines and # comments skipped, relative paths being relative to the manifest
+    if manifest_path is not None:
+        directory = path.dirname(manifest_path)
+        with open(manifest_path, 'r') as manifest:
+            return [
+                path.join(directory, line.strip()) for line in manifest
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+
+    if path.isdir(file_path):
+        return sorted(
+            entry.path for entry in os.scandir(file_path) if entry.is_file() and not entry.name.startswith(".")
+        )
+    return sorted(match for match in glob.glob(file_path, recursive=True) if path.isfile(match))
+
+def output_paths(input_paths: List[str], output_directory: str, output_format: str) -> List[Tuple[str, str]]:
+    # One output per input, named after the input file
+    outputs = {}
+    for input_path in input_paths:
+        name = path.splitext(path.basename(input_path))[0] + OUTPUT_EXTENSIONS[output_format]
+        if name in outputs:
+            raise ValueError(f"{outputs[name]} and {input_path} would both be written to {name}")
+        outputs[name] = input_path
+    return [(input_path, path.join(output_directory, name)) for name, input_path in outputs.items()]
+
+def process_file(args: argparse.Namespace, job: Tuple[str, str]) -> FileResult:
+    # Process pool entry point. Each file is processed serially, the pool runs the files in parallel
+    from strategy_tree import run_cached
+
+    input_path, output_path = job
+    file_args = argparse.Namespace(**{
+        **vars(args),
+        "dv_tree_file_path": input_path,
+        "strategies_file_path": output_path,
+        "workers": 1,
+        "manifest": None,
+        "report": None,
+        "batch": False,
+    })
+    result = FileResult(input_path, output_path, stats=Stats() if args.stats else None)
+
+    start = time.perf_counter()
+    try:
+        run_cached(file_args, result.stats)
+    except Exception as error:
+        result.error = f"{type(error).__name__}: {error}"
+    result.seconds = time.perf_counter() - start
+    return result
+
+def run_batch(args: argparse.Namespace) -> BatchReport:
+    from functools import partial
+
+    start = time.perf_counter()
+    input_paths = resolve_inputs(args.dv_tree_file_path, args.manifest)
+    if not input_paths:
+        raise ValueError(f"No DV tree file found in {args.manifest or args.dv_tree_file_path}")
+
+    jobs = output_paths(input_paths, args.strategies_file_path, args.format)
+    os.makedirs(args.strategies_file_path, exist_ok=True)
+
+    if args.workers == 1:
+        results = [process_file(args, job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Workers are reused across files, imports and interpreter startup are paid once per worker
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            results = list(executor.map(partial(process_file, args), jobs))
+
+    report = BatchReport(results, time.perf_counter() - start)
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump(report.as_dict(), report_file, indent=2)
+    return report
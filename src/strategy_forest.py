@@ -0,0 +1,125 @@
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Self, Set, Tuple
+
+from instrumentation import Stats
+from strategy import Strategy
+from strategy_tree import StrategyTree
+
+if TYPE_CHECKING:
+    from compact_tree import CompactStrategyTree
+
+def _tree_strategies(tree: "CompactStrategyTree", collect_stats: bool = False) -> Tuple[Set[Strategy], Stats | None]:
+    # Module level so that the process pool can pickle it, the worker stats are merged by the parent
+    tree.stats = Stats() if collect_stats else None
+    return tree.get_strategies(), tree.stats
+
+@dataclass
+class StrategyForest:
+    trees: Dict[int, StrategyTree]
+    stats: Stats | None = field(default=None, repr=False, compare=False)
+
+    BOOSTER_REGEXP = r"booster\[(\d+)\]:"
+    BOOSTER_PATTERN = re.compile(BOOSTER_REGEXP)
+
+    def iter_strategies(self, max_workers: int | None = None) -> Iterator[Tuple[int, Set[Strategy]]]:
+        if max_workers == 1:
+            for index, tree in self.trees.items():
+                tree.stats = self.stats
+                yield index, tree.get_strategies()
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+        from compact_tree import CompactStrategyTree
+
+        # Trees are shipped as flat arrays, linked nodes pickle recursively and fail on deep trees
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _tree_strategies,
+                map(CompactStrategyTree.from_tree, self.trees.values()),
+                repeat(self.stats is not None)
+            )
+            for index, (strategies, stats) in zip(self.trees.keys(), results):
+                if stats is not None:
+                    self.stats.merge(stats)
+                yield index, strategies
+
+    def get_strategies(self, max_workers: int | None = None) -> Dict[int, Set[Strategy]]:
+        return dict(self.iter_strategies(max_workers))
+
+    @classmethod
+    def split_lines(cls, lines: Iterable[str]) -> Iterator[Tuple[int, List[str]]]:
+        # A dump without booster headers is a single tree with index 0
+        index, tree_lines = 0, []
+
+        for line in lines:
+            booster_match = cls.BOOSTER_PATTERN.match(line.strip())
+            if booster_match:
+                if tree_lines:
+                    yield index, tree_lines
+                index, tree_lines = int(booster_match.group(1)), []
+            elif line.strip():
+                tree_lines.append(line)
+
+        if tree_lines:
+            yield index, tree_lines
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], stats: Stats | None = None) -> Self:
+        return cls(
+            {index: StrategyTree.from_lines(tree_lines, stats) for index, tree_lines in cls.split_lines(lines)}, stats
+        )
+
+    @classmethod
+    def from_string(cls, content: str) -> Self:
+        return cls.from_lines(content.splitlines())
+
+    @classmethod
+    def from_file(cls, file_path: str, stats: Stats | None = None) -> Self:
+        with open(file_path, 'r') as file:
+            return cls.from_lines(file, stats)
+
+    def write_strategies(
+        self,
+        output_file_path: str,
+        split: bool = False,
+        max_workers: int | None = None,
+        output_format: str = "text",
+        sort_chunk_size: int = 0
+    ) -> None:
+        import strategy_io
+        from strategy_sort import sort_strategies, sorted_conditions
+
+        if split:
+            from os import path
+
+            # The extension follows the format, -o strategies.txt --format binary gives strategies_0.bin
+            root = path.splitext(output_file_path)[0]
+            extension = strategy_io.OUTPUT_EXTENSIONS[output_format]
+            for index, strategies in self.iter_strategies(max_workers):
+                strategy_io.write(
+                    self._counted(strategies), f"{root}_{index}{extension}", output_format, sort_chunk_size
+                )
+            return
+
+        if output_format not in ("text", "jsonl"):
+            raise ValueError(f"Output format '{output_format}' needs one file per tree, use split=True")
+
+        with open(output_file_path, 'w') as strategies_file:
+            for index, strategies in self.iter_strategies(max_workers):
+                strategies = self._counted(strategies)
+                if sort_chunk_size:
+                    strategies = sort_strategies(strategies, sort_chunk_size)
+                if output_format == "jsonl":
+                    strategy_io.write_jsonl(strategies, strategies_file, sort_chunk_size > 0, booster=index)
+                    continue
+                for strategy in strategies:
+                    conditions = sorted_conditions(strategy) if sort_chunk_size else strategy.conditions
+                    strategies_file.write(f"booster[{index}]:{strategy.format(conditions)}\n")
+
+    def _counted(self, strategies: Iterable[Strategy]) -> Iterable[Strategy]:
+        return strategies if self.stats is None else self.stats.count(strategies, "strategies_written")
+
+    def __str__(self) -> str:
+        return "\n".join(f"booster[{index}]:\n{tree}" for index, tree in self.trees.items())
@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Mapping, Self, Tuple
+
+from conditions import Condition, EQ, NE
+from strategy import Strategy
+
+# Below this many bits, survivors are peeled off one lowest bit at a time
+_LEAF_BITS = 1024
+
+@dataclass
+class StrategyIndex:
+    # Inverted index over strategy ids. Posting lists are int bitsets so that a lookup is word-parallel instead of one
+    # Python step per strategy. A strategy is rejected when it pins a variable to another value than the request's,
+    # excludes the request's value, or pins a variable the request lacks. Each (variable, value) key folds the first
+    # two into one rejection bitset, so a lookup is a single OR per request feature. The survivors only have their
+    # residual range conditions checked
+    strategies: List[Strategy] = field(default_factory=list)
+    postings: Dict[Tuple[str, int | str], int] = field(default_factory=dict)
+    pinned: Dict[str, int] = field(default_factory=dict)
+    exclusions: Dict[Tuple[str, int | str], int] = field(default_factory=dict)
+    residuals: List[Tuple[Condition, ...]] = field(default_factory=list)
+    _rejections: Dict[Tuple[str, int | str], int] = field(default_factory=dict, repr=False, compare=False)
+
+    def add(self, strategy: Strategy) -> None:
+        self.extend((strategy,))
+
+    def extend(self, strategies: Iterable[Strategy]) -> None:
+        from collections import defaultdict
+
+        # Ids are gathered per posting first, each bitset is then built in one pass
+        postings, pinned, exclusions = defaultdict(list), defaultdict(list), defaultdict(list)
+
+        for strategy_id, strategy in enumerate(strategies, len(self.strategies)):
+            residuals = []
+            for condition in strategy.conditions:
+                key = (condition.variable, condition.value)
+                if condition.opcode == EQ:
+                    postings[key].append(strategy_id)
+                    pinned[condition.variable].append(strategy_id)
+                elif condition.opcode == NE:
+                    exclusions[key].append(strategy_id)
+                else:
+                    residuals.append(condition)
+
+            self.strategies.append(strategy)
+            self.residuals.append(tuple(residuals))
+
+        for table, ids in ((self.postings, postings), (self.pinned, pinned), (self.exclusions, exclusions)):
+            for key, strategy_ids in ids.items():
+                table[key] = table.get(key, 0) | self._bitset(strategy_ids, len(self.strategies))
+        self._rejections.clear()
+
+    def match_ids(self, features: Mapping[str, int | str]) -> List[int]:
+        rejected = 0
+
+        for feature in features.items():
+            rejected |= self._rejected(feature)
+        if not features.keys() >= self.pinned.keys():
+            for variable, pinned in self.pinned.items():
+                if variable not in features:
+                    rejected |= pinned
+
+        return [
+            strategy_id for strategy_id in self._ids(((1 << len(self.strategies)) - 1) ^ rejected)
+            if all(condition.evaluate(features) for condition in self.residuals[strategy_id])
+        ]
+
+    def match(self, features: Mapping[str, int | str]) -> List[Strategy]:
+        return [self.strategies[strategy_id] for strategy_id in self.match_ids(features)]
+
+    def _rejected(self, feature: Tuple[str, int | str]) -> int:
+        rejected = self._rejections.get(feature)
+        if rejected is None:
+            # Postings are subsets of their variable's pins, the xor leaves the strategies pinned to other values
+            pinned = self.pinned.get(feature[0], 0)
+            if feature not in self.postings and feature not in self.exclusions:
+                # Values unseen in the index are not cached, requests may carry arbitrarily many of them
+                return pinned
+            rejected = (pinned ^ self.postings.get(feature, 0)) | self.exclusions.get(feature, 0)
+            self._rejections[feature] = rejected
+        return rejected
+
+    @staticmethod
+    def _bitset(strategy_ids: List[int], size: int) -> int:
+        bits = bytearray((size + 7) // 8)
+        for strategy_id in strategy_ids:
+            bits[strategy_id >> 3] |= 1 << (strategy_id & 7)
+        return int.from_bytes(bits, "little")
+
+    @staticmethod
+    def _ids(bitset: int, offset: int = 0) -> Iterator[int]:
+        # Halving skips empty ranges in a few word-parallel steps, peeling one bit at a time from a wide int would copy
+        # the whole int per survivor
+        stack = [(bitset, offset)]
+        while stack:
+            bitset, offset = stack.pop()
+            if bitset.bit_length() <= _LEAF_BITS:
+                while bitset:
+                    lowest = bitset & -bitset
+                    yield offset + lowest.bit_length() - 1
+                    bitset ^= lowest
+            else:
+                half = bitset.bit_length() >> 1
+                if high := bitset >> half:
+                    stack.append((high, offset + half))
+                if low := bitset & ((1 << half) - 1):
+                    stack.append((low, offset))
+
+    def __len__(self) -> int:
+        return len(self.strategies)
+
+    @classmethod
+    def from_strategies(cls, strategies: Iterable[Strategy]) -> Self:
+        index = cls()
+        index.extend(strategies)
+        return index
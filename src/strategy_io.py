@@ -0,0 +1,208 @@
+import json
+import struct
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Self, TextIO, Tuple
+
+from conditions import CONDITION_CLASSES, Condition
+from strategy import Strategy
+from strategy_sort import sort_strategies, sorted_conditions
+from strategy_tree import StrategyTree, WRITE_BUFFER_SIZE
+
+FORMATS = ("text", "jsonl", "binary")
+OUTPUT_EXTENSIONS = {"text": ".txt", "jsonl": ".jsonl", "binary": ".bin"}
+
+# Binary layout, little endian:
+#   header   MAGIC, u16 version
+#   records  u16 condition count, f64 value, then per condition u32 variable id, u8 opcode, u32 value id
+#   strings  u8 kind, then i64 for ints, f64 for floats or u32 length + utf-8 bytes for strings, in id order
+#   footer   u64 strings offset, u64 strings count, u64 record count, MAGIC
+# Variables and values share the string table. Ids are assigned while streaming, so the table goes last
+MAGIC = b"DVST"
+VERSION = 1
+HEADER = struct.Struct("<4sH")
+RECORD = struct.Struct("<Hd")
+CONDITION = struct.Struct("<IBI")
+FOOTER = struct.Struct("<QQQ4s")
+INT_ENTRY = struct.Struct("<Bq")
+FLOAT_ENTRY = struct.Struct("<Bd")
+STR_ENTRY = struct.Struct("<BI")
+INT_KIND, STR_KIND, FLOAT_KIND = 0, 1, 2
+
+@dataclass
+class StrategyArrays:
+    # Struct of arrays, one slot per strategy. Conditions of strategy i are
+    # condition_*[condition_offsets[i]:condition_offsets[i + 1]], ids index into strings
+    values: array = field(default_factory=lambda: array("d"))
+    condition_offsets: array = field(default_factory=lambda: array("q", [0]))
+    condition_variables: array = field(default_factory=lambda: array("I"))
+    condition_operators: array = field(default_factory=lambda: array("B"))
+    condition_values: array = field(default_factory=lambda: array("I"))
+    strings: List[int | float | str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def conditions(self, index: int) -> List[Condition]:
+        start, end = self.condition_offsets[index], self.condition_offsets[index + 1]
+        return [
+            CONDITION_CLASSES[self.condition_operators[position]](
+                self.strings[self.condition_variables[position]], self.strings[self.condition_values[position]]
+            )
+            for position in range(start, end)
+        ]
+
+    def iter_strategies(self) -> Iterator[Strategy]:
+        for index, value in enumerate(self.values):
+            yield Strategy(conditions=frozenset(self.conditions(index)), value=value)
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes) -> Self:
+        magic, version = HEADER.unpack_from(buffer)
+        strings_offset, strings_count, records_count, trailing_magic = FOOTER.unpack_from(
+            buffer, len(buffer) - FOOTER.size
+        )
+        if magic != MAGIC or trailing_magic != MAGIC:
+            raise ValueError("Not a binary strategies file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported binary strategies version: {version}")
+
+        arrays = cls(strings=_read_strings(buffer, strings_offset, strings_count))
+        position = HEADER.size
+
+        for _ in range(records_count):
+            count, value = RECORD.unpack_from(buffer, position)
+            position += RECORD.size
+            arrays.values.append(value)
+
+            end = position + count * CONDITION.size
+            for variable_id, operator_code, value_id in CONDITION.iter_unpack(buffer[position:end]):
+                arrays.condition_variables.append(variable_id)
+                arrays.condition_operators.append(operator_code)
+                arrays.condition_values.append(value_id)
+            arrays.condition_offsets.append(len(arrays.condition_variables))
+            position = end
+
+        return arrays
+
+def _read_strings(buffer: bytes, position: int, count: int) -> List[int | float | str]:
+    strings = []
+
+    for _ in range(count):
+        kind = buffer[position]
+        if kind == INT_KIND:
+            strings.append(INT_ENTRY.unpack_from(buffer, position)[1])
+            position += INT_ENTRY.size
+        elif kind == FLOAT_KIND:
+            strings.append(FLOAT_ENTRY.unpack_from(buffer, position)[1])
+            position += FLOAT_ENTRY.size
+        else:
+            length = STR_ENTRY.unpack_from(buffer, position)[1]
+            position += STR_ENTRY.size
+            strings.append(buffer[position:position + length].decode())
+            position += length
+
+    return strings
+
+def _conditions(strategy: Strategy, canonical: bool) -> Iterable[Condition]:
+    return sorted_conditions(strategy) if canonical else strategy.conditions
+
+def write_text(strategies: Iterable[Strategy], file: TextIO, canonical: bool = False) -> None:
+    if not canonical:
+        file.writelines(f"{strategy}\n" for strategy in strategies)
+        return
+    file.writelines(f"{strategy.format(sorted_conditions(strategy))}\n" for strategy in strategies)
+
+def write_jsonl(strategies: Iterable[Strategy], file: TextIO, canonical: bool = False, **fields: Any) -> None:
+    # Extra fields (e.g. the booster index of a forest) are added to every record
+    file.writelines(
+        json.dumps({
+            **fields,
+            "conditions": [
+                [condition.variable, condition.operator, condition.value] for condition in _conditions(strategy, canonical)
+            ],
+            "value": strategy.value
+        }) + "\n"
+        for strategy in strategies
+    )
+
+def write_binary(strategies: Iterable[Strategy], file: BinaryIO, canonical: bool = False) -> None:
+    # Ints and strings with the same text are different values, the kind is part of the key
+    string_ids: Dict[Tuple[type, int | float | str], int] = {}
+
+    def string_id(value: int | float | str) -> int:
+        return string_ids.setdefault((type(value), value), len(string_ids))
+
+    file.write(HEADER.pack(MAGIC, VERSION))
+    offset, records_count = HEADER.size, 0
+
+    for strategy in strategies:
+        record = [RECORD.pack(len(strategy.conditions), strategy.value)]
+        record.extend(
+            CONDITION.pack(string_id(condition.variable), condition.opcode, string_id(condition.value))
+            for condition in _conditions(strategy, canonical)
+        )
+        record = b"".join(record)
+        file.write(record)
+        offset += len(record)
+        records_count += 1
+
+    for kind, value in string_ids:
+        if kind is int:
+            file.write(INT_ENTRY.pack(INT_KIND, value))
+        elif kind is float:
+            file.write(FLOAT_ENTRY.pack(FLOAT_KIND, value))
+        else:
+            encoded = value.encode()
+            file.write(STR_ENTRY.pack(STR_KIND, len(encoded)))
+            file.write(encoded)
+
+    file.write(FOOTER.pack(offset, len(string_ids), records_count, MAGIC))
+
+def write(
+    strategies: Iterable[Strategy], output_file_path: str, output_format: str = "text", sort_chunk_size: int = 0
+) -> None:
+    # sort_chunk_size > 0 writes strategies and their conditions in canonical order, sorting at most that many
+    # strategies in memory at once. Identical strategy sets then give byte-identical files
+    if output_format not in FORMATS:
+        raise ValueError(f"Unsupported output format '{output_format}', expected one of {', '.join(FORMATS)}")
+
+    canonical = sort_chunk_size > 0
+    if canonical:
+        strategies = sort_strategies(strategies, sort_chunk_size)
+
+    if output_format == "binary":
+        with open(output_file_path, 'wb', buffering=WRITE_BUFFER_SIZE) as strategies_file:
+            write_binary(strategies, strategies_file, canonical)
+        return
+
+    with open(output_file_path, 'w', buffering=WRITE_BUFFER_SIZE) as strategies_file:
+        if output_format == "jsonl":
+            write_jsonl(strategies, strategies_file, canonical)
+        else:
+            write_text(strategies, strategies_file, canonical)
+
+def read_binary_arrays(file_path: str) -> StrategyArrays:
+    with open(file_path, 'rb') as file:
+        return StrategyArrays.from_bytes(file.read())
+
+def read_binary(file_path: str) -> List[Strategy]:
+    return list(read_binary_arrays(file_path).iter_strategies())
+
+def read_jsonl(file_path: str) -> List[Strategy]:
+    strategies = []
+
+    with open(file_path, 'r') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            strategies.append(Strategy(
+                conditions=frozenset(
+                    StrategyTree.CONDITION_CLASSES[operator](variable, value)
+                    for variable, operator, value in record["conditions"]
+                ),
+                value=record["value"]
+            ))
+
+    return strategies
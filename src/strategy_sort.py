@@ -0,0 +1,78 @@
+import heapq
+import pickle
+import tempfile
+from itertools import chain, islice
+from os import path
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from conditions import CONDITION_CLASSES, Condition
+from strategy import Strategy
+
+SORT_CHUNK_SIZE = 200_000
+SPILL_BATCH_SIZE = 1024
+
+# ((variable, opcode, (rank, value)), ...), value
+StrategyKey = Tuple[Tuple[Tuple[str, int, Tuple[int, Any]], ...], float]
+
+_EXHAUSTED = object()
+
+def value_key(value: int | float | str) -> Tuple[int, Any]:
+    # Numbers before strings, so that typed values of one variable always compare
+    return (1, value) if isinstance(value, str) else (0, value)
+
+def condition_key(condition: Condition) -> Tuple[str, int, Tuple[int, Any]]:
+    return condition.variable, condition.opcode, value_key(condition.value)
+
+def sorted_conditions(strategy: Strategy) -> List[Condition]:
+    return sorted(strategy.conditions, key=condition_key)
+
+def strategy_key(strategy: Strategy) -> StrategyKey:
+    return tuple(sorted(map(condition_key, strategy.conditions))), strategy.value
+
+def _from_key(key: StrategyKey) -> Strategy:
+    conditions, value = key
+    return Strategy(
+        conditions=frozenset(
+            CONDITION_CLASSES[opcode](variable, condition_value) for variable, opcode, (_, condition_value) in conditions
+        ),
+        value=value
+    )
+
+def sort_strategies(
+    strategies: Iterable[Strategy], chunk_size: int = SORT_CHUNK_SIZE, temp_dir: str | None = None
+) -> Iterator[Strategy]:
+    # Strategies in canonical order (conditions sorted by variable, operator and value, then the leaf value).
+    # Up to chunk_size strategies are sorted in memory. Larger inputs are cut into sorted runs of chunk_size keys
+    # spilled to temporary files, then k-way merged while holding one batch per run
+    iterator = iter(strategies)
+    chunk = list(islice(iterator, chunk_size))
+    following = next(iterator, _EXHAUSTED)
+    if following is _EXHAUSTED:
+        yield from sorted(chunk, key=strategy_key)
+        return
+
+    iterator = chain((following,), iterator)
+    with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+        run_paths = []
+        while chunk:
+            run_path = path.join(directory, f"{len(run_paths)}.run")
+            _write_run(sorted(map(strategy_key, chunk)), run_path)
+            run_paths.append(run_path)
+            chunk = list(islice(iterator, chunk_size))
+
+        for key in heapq.merge(*map(_read_run, run_paths)):
+            yield _from_key(key)
+
+def _write_run(keys: List[StrategyKey], run_path: str) -> None:
+    with open(run_path, 'wb') as file:
+        for start in range(0, len(keys), SPILL_BATCH_SIZE):
+            pickle.dump(keys[start:start + SPILL_BATCH_SIZE], file, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_run(run_path: str) -> Iterator[StrategyKey]:
+    with open(run_path, 'rb') as file:
+        while True:
+            try:
+                batch = pickle.load(file)
+            except EOFError:
+                return
+            yield from batch
@@ -1,16 +1,31 @@
 import argparse
-from dataclasses import dataclass
+import operator
+import re
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from abc import ABC
-from typing import List, Self, Set
-
-from conditions import (
-    Condition,
-    EqualsCondition, NotEqualsCondition,
-    GreaterThanCondition, GreaterThanOrEqualCondition,
-    LessThanCondition, LessThanOrEqualCondition
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, MutableMapping, Self, Set, Tuple
 )
-from strategy import Strategy
-    
+
+from conditions import CONDITION_CLASSES, Condition, ConditionFactory
+from instrumentation import Stats
+from strategy import MINIMIZE_PASSES, PathState, Strategy, deduplicate, extend_state, initial_state, minimize
+from strategy_sort import SORT_CHUNK_SIZE
+
+if TYPE_CHECKING:
+    import numpy
+    import queue
+    from compact_tree import CompactStrategyTree
+    from result_cache import ResultCache
+
+WRITE_BUFFER_SIZE = 1 << 20
+FRONTIER_DEPTH = 4
+# Pipelined runs hand nodes and strategies between threads in batches, at most PIPELINE_QUEUE_SIZE strategy
+# batches wait for the writer
+PIPELINE_BATCH_SIZE = 1024
+PIPELINE_QUEUE_SIZE = 64
+
 @dataclass
 class TreeNode(ABC):
     id: int
@@ -53,93 +68,736 @@ class ConditionNode(TreeNode):
 @dataclass
 class StrategyTree:
     root: TreeNode
+    condition_factory: ConditionFactory = field(default_factory=ConditionFactory, repr=False, compare=False)
+    stats: Stats | None = field(default=None, repr=False, compare=False)
+    # Variables known to only take integer values, their range conditions are simplified as integer intervals
+    integral_variables: frozenset[str] = field(default=frozenset(), repr=False, compare=False)
 
-    LEAF_REGEXP = r"(\d+):leaf=([\d.]+)"
+    INT_REGEXP = r"-?\d+"
+    FLOAT_REGEXP = r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+    LEAF_REGEXP = rf"(\d+):leaf=({FLOAT_REGEXP})"
     CONDITION_VALUE_REGEXP = r"(\d+):\[(.*)\]\s?yes=(\d+),\s?no=(\d+)"
-    CONDITION_REGEXP = r"(\w+)(=|!=|>|<|>=|<=)(\S+)"
-    CONDITION_CLASSES = {
-        "=": EqualsCondition,
-        "!=": NotEqualsCondition,
-        ">": GreaterThanCondition,
-        ">=": GreaterThanOrEqualCondition,
-        "<": LessThanCondition,
-        "<=": LessThanOrEqualCondition
+    # Two-character operators first, otherwise x>=5 reads as x > "=5"
+    CONDITION_REGEXP = r"(\w+)(!=|>=|<=|=|>|<)(\S+)"
+    CONDITION_CLASSES = {condition_class.operator: condition_class for condition_class in CONDITION_CLASSES}
+
+    INT_PATTERN = re.compile(INT_REGEXP)
+    FLOAT_PATTERN = re.compile(FLOAT_REGEXP)
+    LEAF_PATTERN = re.compile(LEAF_REGEXP)
+    CONDITION_VALUE_PATTERN = re.compile(CONDITION_VALUE_REGEXP)
+    CONDITION_PATTERN = re.compile(CONDITION_REGEXP)
+
+    # Bytes counterparts used by the mmap parser, one match per node line
+    NODE_BYTES_PATTERN = re.compile(
+        rb"^[^\S\n]*(\d+):(?:leaf=(" + FLOAT_REGEXP.encode() + rb")|\[(.*)\][^\S\n]?yes=(\d+),[^\S\n]?no=(\d+))",
+        re.MULTILINE
+    )
+    CONDITION_BYTES_PATTERN = re.compile(CONDITION_REGEXP.encode())
+
+    # Inlined comparisons used by compile(), with the same missing feature semantics as Condition.evaluate
+    COMPILED_OPERATORS = {
+        "=": "get({variable}) == {value}",
+        "!=": "get({variable}) != {value}",
+        ">": "(feature := get({variable})) is not None and feature > {value}",
+        ">=": "(feature := get({variable})) is not None and feature >= {value}",
+        "<": "(feature := get({variable})) is not None and feature < {value}",
+        "<=": "(feature := get({variable})) is not None and feature <= {value}",
+    }
+    COMPILE_MAX_NESTING = 40
+
+    BATCH_OPERATORS = {
+        "=": operator.eq,
+        "!=": operator.ne,
+        ">": operator.gt,
+        ">=": operator.ge,
+        "<": operator.lt,
+        "<=": operator.le,
     }
 
-    def get_strategies(self) -> Set[Strategy]:
-        stack = [(self.root, frozenset())]
-        results = set()
+    def iter_strategies(
+        self,
+        dedupe_window: int | None = 0,
+        max_workers: int | None = 1,
+        frontier_depth: int = FRONTIER_DEPTH,
+        disjoint: bool = False,
+        memoize: bool = False
+    ) -> Iterator[Strategy]:
+        if dedupe_window != 0:
+            yield from deduplicate(
+                self.iter_strategies(0, max_workers, frontier_depth, disjoint, memoize), dedupe_window, self.stats
+            )
+        elif max_workers == 1:
+            yield from self._expand(self.root, initial_state(self.integral_variables), disjoint, memoize)
+        else:
+            yield from self._expand_parallel(max_workers, frontier_depth, disjoint, memoize)
+
+    def _branches(
+        self, node: ConditionNode, state: PathState, disjoint: bool = False
+    ) -> Iterable[Tuple[TreeNode, PathState]]:
+        branches = self._iter_branches(node, state, disjoint)
+        if self.stats is None:
+            return branches
+
+        # A node has one branch per disjunct plus the false one, the missing ones were cut by a contradiction
+        branches = list(branches)
+        self.stats.paths_explored += len(branches)
+        self.stats.paths_killed += len(node.conditions) + 1 - len(branches)
+        return branches
+
+    def _iter_branches(
+        self, node: ConditionNode, state: PathState, disjoint: bool = False
+    ) -> Iterator[Tuple[TreeNode, PathState]]:
+        # Branches whose path became unsatisfiable are dropped with their whole subtree
+        negate = self.condition_factory.negate
+
+        if not disjoint:
+            for condition in node.conditions:
+                true_state = extend_state(state, (condition,))
+                if true_state is not None:
+                    yield node.true_branch, true_state
+
+            false_state = extend_state(state, map(negate, node.conditions))
+        else:
+            # Each disjunct only applies where the previous ones failed (c1; !c1 & c2; !c1 & !c2 & c3 ...), so the
+            # true branch regions do not overlap and the subtree is not enumerated twice for the same request
+            false_state = state
+            for condition in node.conditions:
+                true_state = extend_state(false_state, (condition,))
+                if true_state is not None:
+                    yield node.true_branch, true_state
+
+                false_state = extend_state(false_state, (negate(condition),))
+                if false_state is None:
+                    return
+
+        if false_state is not None:
+            yield node.false_branch, false_state
+
+    def _expand(
+        self, node: TreeNode, state: PathState, disjoint: bool = False, memoize: bool = False
+    ) -> Iterator[Strategy]:
+        if memoize:
+            yield from self._expand_memoized(node, state, disjoint)
+            return
+
+        # Depth first, the stack only holds the pending siblings along the current path. Each entry carries the
+        # per-variable domains of its path, so strategies come out already simplified at the leaves
+        stats = self.stats
+        stack = [(node, state)]
 
         while stack:
-            node, accumulator = stack.pop()
+            node, state = stack.pop()
 
             if isinstance(node, LeafNode):
-                strategy = Strategy(conditions=accumulator, value=node.value).prune()
-                if strategy is not None:
-                    results.add(strategy)
+                if stats is not None:
+                    stats.prune_calls += 1
+                yield Strategy.from_state(state, node.value)
+            elif isinstance(node, ConditionNode):
+                stack.extend(self._branches(node, state, disjoint))
+
+    def _expand_memoized(
+        self,
+        node: TreeNode,
+        state: PathState,
+        disjoint: bool = False,
+        suffixes_cache: MutableMapping[Tuple[Hashable, frozenset], List[Strategy]] | None = None,
+        node_key: Callable[[ConditionNode], Hashable] | None = None,
+        cuts: Set[int] | None = None
+    ) -> Iterator[Strategy]:
+        # A subtree only reads and narrows the domains of its own variables, so its strategy suffixes (the strategies
+        # of its leaves over those variables) are a function of the node and of the path state projected on those
+        # variables. The other variables keep their domain, their conditions are added to each suffix as is.
+        # Suffixes are only kept at cut nodes, by default the ones reached by several parents (DAG), which are then
+        # walked once per distinct projection instead of once per incoming path. Everything else is walked as by
+        # _expand, so a plain tree costs about the same as without memoization. Suffixes are cached by node id
+        # unless node_key says otherwise (e.g. a subtree content hash)
+        variables_cache = {}
+        if suffixes_cache is None:
+            suffixes_cache = {}
+        if node_key is None:
+            node_key = operator.attrgetter("id")
+        if cuts is None:
+            cuts = self._shared_ids(node)
+
+        def variables(node: ConditionNode) -> frozenset[str]:
+            # Post-order with an explicit stack, children are resolved before their parent
+            stack = [(node, False)]
+            while stack:
+                current, expanded = stack.pop()
+                if current.id in variables_cache:
+                    continue
+
+                children = [
+                    child for child in (current.true_branch, current.false_branch) if isinstance(child, ConditionNode)
+                ]
+                if not expanded:
+                    stack.append((current, True))
+                    stack.extend((child, False) for child in children if child.id not in variables_cache)
+                    continue
+
+                variables_cache[current.id] = frozenset(condition.variable for condition in current.conditions).union(
+                    *(variables_cache[child.id] for child in children)
+                )
+            return variables_cache[node.id]
+
+        # One frame per cut node whose suffixes are being collected, the first one yields the strategies instead.
+        # A frame walks depth first like _expand. When it reaches a cut node missing from the cache, the entry is
+        # put back, a frame is opened for that node and the entry is retried once the frame has been stored
+        stats = self.stats
+        frames = [(None, [(node, state)], None)]
+
+        while frames:
+            key, stack, collected = frames[-1]
+            while stack:
+                node, state = stack.pop()
+                if isinstance(node, LeafNode):
+                    strategy = Strategy.from_state(state, node.value)
+                    if collected is not None:
+                        collected.append(strategy)
+                        continue
+                    if stats is not None:
+                        stats.prune_calls += 1
+                    yield strategy
+                    continue
+                if not isinstance(node, ConditionNode):
+                    continue
+                if node.id not in cuts:
+                    stack.extend(self._branches(node, state, disjoint))
+                    continue
+
+                node_variables = variables(node)
+                projected = {variable: domain for variable, domain in state.items() if variable in node_variables}
+                suffixes_key = (node_key(node), frozenset(projected.items()))
+                node_suffixes = suffixes_cache.get(suffixes_key)
+                if node_suffixes is None:
+                    stack.append((node, state))
+                    frames.append((suffixes_key, list(self._branches(node, projected, disjoint)), []))
+                    break
+
+                # The cached strategies are reused as is when the path has no condition outside the subtree
+                rest = Strategy.from_state(
+                    {variable: domain for variable, domain in state.items() if variable not in node_variables}, 0.0
+                ).conditions
+                for strategy in node_suffixes:
+                    if rest:
+                        strategy = Strategy(conditions=strategy.conditions | rest, value=strategy.value)
+                    if collected is not None:
+                        collected.append(strategy)
+                        continue
+                    if stats is not None:
+                        stats.prune_calls += 1
+                    yield strategy
+            else:
+                frames.pop()
+                if key is not None:
+                    suffixes_cache[key] = collected
+
+    def _shared_ids(self, node: TreeNode) -> Set[int]:
+        # Ids of the nodes below node that are the child of more than one branch
+        seen, shared = set(), set()
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if not isinstance(current, ConditionNode):
+                continue
+            for child in (current.true_branch, current.false_branch):
+                if isinstance(child, ConditionNode):
+                    if child.id in seen:
+                        shared.add(child.id)
+                    else:
+                        seen.add(child.id)
+                        stack.append(child)
+        return shared
+
+    def _expand_parallel(
+        self, max_workers: int | None, frontier_depth: int, disjoint: bool, memoize: bool = False
+    ) -> Iterator[Strategy]:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from compact_tree import CompactStrategyTree
+
+        # Leaves above the frontier are emitted here, deeper subtrees are shipped with their path prefix
+        frontier = []
+        stack = [(self.root, initial_state(self.integral_variables), 0)]
+
+        while stack:
+            node, state, depth = stack.pop()
+
+            if isinstance(node, LeafNode):
+                if self.stats is not None:
+                    self.stats.prune_calls += 1
+                yield Strategy.from_state(state, node.value)
+            elif isinstance(node, ConditionNode):
+                if depth >= frontier_depth:
+                    frontier.append((node.id, state))
+                else:
+                    stack.extend(
+                        (child, child_state, depth + 1) for child, child_state in self._branches(node, state, disjoint)
+                    )
+
+        if not frontier:
+            return
+
+        # Linked nodes pickle recursively and fail on deep subtrees, workers get the flat arrays once and
+        # relink them, jobs only carry a node id and the path state
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_init_worker, initargs=(CompactStrategyTree.from_tree(self),)
+        ) as executor:
+            futures = [
+                executor.submit(_expand_subtree, node_id, state, disjoint, memoize, self.stats is not None)
+                for node_id, state in frontier
+            ]
+            for future in as_completed(futures):
+                strategies, worker_stats = future.result()
+                if worker_stats is not None:
+                    self.stats.merge(worker_stats)
+                yield from strategies
+
+    def get_strategies(
+        self,
+        max_workers: int | None = 1,
+        frontier_depth: int = FRONTIER_DEPTH,
+        disjoint: bool = False,
+        memoize: bool = False
+    ) -> Set[Strategy]:
+        return set(self.iter_strategies(
+            max_workers=max_workers, frontier_depth=frontier_depth, disjoint=disjoint, memoize=memoize
+        ))
+
+    def subtree_hashes(self) -> Dict[int, bytes]:
+        # Structural content hash per node id: conditions in order, leaf values and the children's hashes, node ids
+        # left out. Identical subtrees get the same hash across trees and retrainings
+        import hashlib
+
+        hashes = {}
+        for node in self._post_order():
+            digest = hashlib.blake2b(digest_size=16)
+            if isinstance(node, LeafNode):
+                digest.update(f"leaf={node.value!r}".encode())
+            else:
+                digest.update("||or||".join(
+                    f"{condition.variable}{condition.operator}{condition.value!r}" for condition in node.conditions
+                ).encode())
+                digest.update(hashes.get(getattr(node.true_branch, "id", None), b""))
+                digest.update(b"|")
+                digest.update(hashes.get(getattr(node.false_branch, "id", None), b""))
+            hashes[node.id] = digest.digest()
+        return hashes
+
+    def subtree_sizes(self) -> Dict[int, int]:
+        # Number of nodes below and including each node, a shared subtree being counted once per parent
+        sizes = {}
+        for node in self._post_order():
+            sizes[node.id] = 1 if isinstance(node, LeafNode) else 1 + sum(
+                sizes.get(getattr(child, "id", None), 0) for child in (node.true_branch, node.false_branch)
+            )
+        return sizes
+
+    def _post_order(self) -> Iterator[TreeNode]:
+        # Every node reachable from the root once, after its children, with an explicit stack
+        if self.root is None:
+            return
 
+        done = set()
+        stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node.id in done:
+                continue
+            if expanded or not isinstance(node, ConditionNode):
+                done.add(node.id)
+                yield node
+                continue
+
+            stack.append((node, True))
+            stack.extend(
+                (child, False) for child in (node.false_branch, node.true_branch)
+                if isinstance(child, TreeNode) and child.id not in done
+            )
+
+    def predict(self, features: Mapping[str, int | str]) -> float | None:
+        node = self.root
+
+        while isinstance(node, ConditionNode):
+            if any(condition.evaluate(features) for condition in node.conditions):
+                node = node.true_branch
+            else:
+                node = node.false_branch
+
+        return node.value if isinstance(node, LeafNode) else None
+
+    def predict_batch(self, columns: Mapping[str, Any], size: int | None = None) -> "numpy.ndarray":
+        # Columns are NumPy arrays (NaN as missing), or categorical (codes, categories) pairs where code -1 is missing.
+        # Each node evaluates its conditions as masks over the rows routed to it, unreached rows stay NaN
+        import numpy as np
+
+        columns = {variable: self._batch_column(column) for variable, column in columns.items()}
+        if size is None:
+            size = len(next(iter(columns.values()))[0]) if columns else 0
+
+        results = np.full(size, np.nan)
+        stack = [(self.root, np.arange(size))]
+
+        while stack:
+            node, rows = stack.pop()
+            if not len(rows):
+                continue
+
+            if isinstance(node, LeafNode):
+                results[rows] = node.value
             elif isinstance(node, ConditionNode):
+                mask = np.zeros(len(rows), dtype=bool)
                 for condition in node.conditions:
-                    stack.append((node.true_branch, accumulator | {condition}))
+                    mask |= self._batch_mask(condition, columns, rows)
 
-                stack.append(
-                    (node.false_branch, accumulator | {condition.negate() for condition in node.conditions})
-                )
+                stack.append((node.true_branch, rows[mask]))
+                stack.append((node.false_branch, rows[~mask]))
 
         return results
 
+    @staticmethod
+    def _batch_column(column: Any) -> Tuple[Any, Any]:
+        import numpy as np
+
+        if isinstance(column, tuple):
+            codes, categories = column
+            return np.asarray(codes), list(categories)
+        if hasattr(column, "codes") and hasattr(column, "categories"):
+            return np.asarray(column.codes), list(column.categories)
+        return np.asarray(column), None
+
+    def _batch_mask(self, condition: Condition, columns: Mapping[str, Tuple[Any, Any]], rows: Any) -> Any:
+        import numpy as np
+
+        if condition.variable not in columns:
+            return np.full(len(rows), condition.evaluate({}))
+
+        values, categories = columns[condition.variable]
+        if categories is None:
+            return self.BATCH_OPERATORS[condition.operator](values[rows], condition.value)
+
+        # Categorical columns evaluate the condition once per category, the trailing entry is picked by code -1
+        lookup = np.array(
+            [condition.evaluate({condition.variable: category}) for category in categories] + [condition.evaluate({})]
+        )
+        return lookup[values[rows]]
+
+    def compile_source(self, function_name: str = "predict") -> str:
+        # Subtrees deeper than COMPILE_MAX_NESTING are moved to helper functions to stay clear of
+        # the compiler's indentation limit
+        functions = []
+
+        def condition_source(condition: Condition) -> str:
+            return self.COMPILED_OPERATORS[condition.operator].format(
+                variable=repr(condition.variable), value=repr(condition.value)
+            )
+
+        # Work items are nodes to emit or lines to append once the preceding subtree is emitted, popped depth first so
+        # that the source comes out in order without recursing down the tree
+        stack = []
+
+        def function_source(node: ConditionNode) -> str:
+            name = f"_node_{len(functions)}"
+            lines = [f"def {name}(get):"]
+            functions.append(lines)
+            stack.append((node, 0, lines))
+            return name
+
+        lines = [f"def {function_name}(features):", "    get = features.get"]
+        stack.append((self.root, 0, lines))
+
+        while stack:
+            node, depth, node_lines = stack.pop()
+            if isinstance(node, str):
+                node_lines.append(node)
+                continue
+
+            indent = "    " * (depth + 1)
+            if isinstance(node, LeafNode):
+                node_lines.append(f"{indent}return {node.value!r}")
+            elif not isinstance(node, ConditionNode):
+                node_lines.append(f"{indent}return None")
+            elif depth >= self.COMPILE_MAX_NESTING:
+                node_lines.append(f"{indent}return {function_source(node)}(get)")
+            else:
+                node_lines.append(f"{indent}if {' or '.join(f'({condition_source(c)})' for c in node.conditions)}:")
+                stack.extend((
+                    (node.false_branch, depth + 1, node_lines),
+                    (f"{indent}else:", depth, node_lines),
+                    (node.true_branch, depth + 1, node_lines),
+                ))
+
+        return "\n\n".join("\n".join(function_lines) for function_lines in [*functions, lines]) + "\n"
+
+    def compile(self) -> Callable[[Mapping[str, int | str]], float | None]:
+        source = self.compile_source()
+        namespace = {}
+        exec(compile(source, "<strategy_tree>", "exec"), namespace)
+
+        predict = namespace["predict"]
+        predict.source = source
+        return predict
+
     @classmethod
-    def from_string(cls, content: str) -> Self:
-        import re
-        
-        nodes = {}
-        for line in content.splitlines():
+    def _make_condition(
+        cls,
+        variable: str,
+        operator: str,
+        value: str,
+        condition_str: str | bytes,
+        condition_factory: ConditionFactory
+    ) -> Condition:
+        value = cls._parse_value(value)
+
+        condition_class = cls.CONDITION_CLASSES.get(operator)
+        if not condition_class:
+            # Bytes from the mmap parser are only decoded for the message
+            if isinstance(condition_str, bytes):
+                condition_str = condition_str.decode()
+            raise ValueError(f"Unsupported operator '{operator}' in condition: {condition_str}")
+
+        return condition_factory.create(condition_class, variable, value)
+
+    @classmethod
+    def _parse_value(cls, value: str) -> int | float | str:
+        # Numbers are typed so that range conditions compare numerically, anything else is a categorical string
+        if cls.INT_PATTERN.fullmatch(value):
+            return int(value)
+        if cls.FLOAT_PATTERN.fullmatch(value):
+            return float(value)
+        return value
+
+    @classmethod
+    def _parse_condition(cls, condition: str, condition_str: str, condition_factory: ConditionFactory) -> Condition:
+        condition_match = cls.CONDITION_PATTERN.match(condition.strip())
+        if not condition_match:
+            raise ValueError(f"Invalid condition format: {condition_str}")
+
+        return cls._make_condition(*condition_match.groups(), condition_str, condition_factory)
+
+    @classmethod
+    def _parse_condition_bytes(
+        cls, condition: bytes, condition_str: bytes, condition_factory: ConditionFactory
+    ) -> Condition:
+        condition_match = cls.CONDITION_BYTES_PATTERN.match(condition.strip())
+        if not condition_match:
+            raise ValueError(f"Invalid condition format: {condition_str.decode()}")
+
+        variable, operator, value = (group.decode() for group in condition_match.groups())
+        return cls._make_condition(variable, operator, value, condition_str, condition_factory)
+
+    @classmethod
+    def iter_nodes(
+        cls, lines: Iterable[str], condition_factory: ConditionFactory | None = None
+    ) -> Iterator[TreeNode]:
+        # Nodes are yielded unlinked: ConditionNode branches still hold the child ids
+        if condition_factory is None:
+            condition_factory = ConditionFactory()
+
+        for line in lines:
             line = line.strip()
 
-            leaf_match = re.match(cls.LEAF_REGEXP, line)
+            leaf_match = cls.LEAF_PATTERN.match(line)
             if leaf_match:
                 node_id, node_value = int(leaf_match.group(1)), float(leaf_match.group(2))
-                nodes[node_id] = LeafNode(node_id, node_value)
-            else:
-                condition_match = re.match(cls.CONDITION_VALUE_REGEXP, line)
-                if condition_match:
-                    condition_regex = re.compile(cls.CONDITION_REGEXP)
-                    node_id, condition_str, yes_id, no_id = int(condition_match.group(1)), condition_match.group(2), int(condition_match.group(3)), int(condition_match.group(4))
-
-                    condition_list = []
-                    for condition in condition_str.split("||or||"):
-                        condition_match = condition_regex.match(condition.strip())
-                        if not condition_match:
-                            raise ValueError(f"Invalid condition format: {condition_str}")
-                        
-                        variable, operator, value = condition_match.groups()
-                        value = int(value) if value.isdigit() else value
-
-                        condition_class = cls.CONDITION_CLASSES.get(operator)
-                        if not condition_class:
-                            raise ValueError(f"Unsupported operator '{operator}' in condition: {condition_str}")
-
-                        condition_list.append(condition_class(variable, value))
-
-                    nodes[node_id] = ConditionNode(node_id, condition_list, yes_id, no_id)
-        
+                yield LeafNode(node_id, node_value)
+                continue
+
+            condition_match = cls.CONDITION_VALUE_PATTERN.match(line)
+            if condition_match:
+                node_id, condition_str, yes_id, no_id = condition_match.groups()
+                condition_list = [
+                    cls._parse_condition(condition, condition_str, condition_factory)
+                    for condition in condition_str.split("||or||")
+                ]
+                yield ConditionNode(int(node_id), condition_list, int(yes_id), int(no_id))
+
+    @classmethod
+    def iter_nodes_mmap(cls, file_path: str, condition_factory: ConditionFactory | None = None) -> Iterator[TreeNode]:
+        # Scans the page-cache backed mapping as bytes, only ids, names and values get decoded
+        import mmap
+        import os
+
+        if condition_factory is None:
+            condition_factory = ConditionFactory()
+
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                for node_match in cls.NODE_BYTES_PATTERN.finditer(buffer):
+                    node_id, leaf_value, condition_str, yes_id, no_id = node_match.groups()
+
+                    if leaf_value is not None:
+                        yield LeafNode(int(node_id), float(leaf_value))
+                        continue
+
+                    condition_list = [
+                        cls._parse_condition_bytes(condition, condition_str, condition_factory)
+                        for condition in condition_str.split(b"||or||")
+                    ]
+                    yield ConditionNode(int(node_id), condition_list, int(yes_id), int(no_id))
+
+    @classmethod
+    def from_nodes(cls, nodes: Iterable[TreeNode], condition_factory: ConditionFactory | None = None) -> Self:
+        nodes = {node.id: node for node in nodes}
+
         for node in nodes.values():
             if isinstance(node, ConditionNode):
                 node.true_branch = nodes.get(node.true_branch)
                 node.false_branch = nodes.get(node.false_branch)
-        
-        return StrategyTree(nodes[0])
+
+        if condition_factory is None:
+            return cls(nodes[0])
+        return cls(nodes[0], condition_factory)
+
+    @classmethod
+    def _from_parsed_nodes(
+        cls, nodes: Iterable[TreeNode], condition_factory: ConditionFactory, stats: Stats | None
+    ) -> Self:
+        if stats is None:
+            return cls.from_nodes(nodes, condition_factory)
+
+        with stats.phase("parse"):
+            tree = cls.from_nodes(stats.count(nodes, "nodes_parsed"), condition_factory)
+        tree.stats = stats
+        return tree
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str], stats: Stats | None = None) -> Self:
+        condition_factory = ConditionFactory()
+        return cls._from_parsed_nodes(cls.iter_nodes(lines, condition_factory), condition_factory, stats)
+
+    @classmethod
+    def from_string(cls, content: str) -> Self:
+        return cls.from_lines(content.splitlines())
+
+    @classmethod
+    def from_mmap(cls, file_path: str, stats: Stats | None = None) -> Self:
+        condition_factory = ConditionFactory()
+        return cls._from_parsed_nodes(cls.iter_nodes_mmap(file_path, condition_factory), condition_factory, stats)
 
     @classmethod
-    def from_file(cls, file_path: str) -> Self:
+    def from_file(cls, file_path: str, use_mmap: bool = False, stats: Stats | None = None) -> Self:
+        if use_mmap:
+            return cls.from_mmap(file_path, stats)
+
         with open(file_path, 'r') as file:
-            content = file.read()
-        return cls.from_string(content)
+            return cls.from_lines(file, stats)
+
+    def write_strategies(
+        self,
+        output_file_path: str,
+        dedupe_window: int | None = None,
+        max_workers: int | None = 1,
+        frontier_depth: int = FRONTIER_DEPTH,
+        minimize_passes: int = 0,
+        disjoint: bool = False,
+        memoize: bool = False,
+        output_format: str = "text",
+        sort_chunk_size: int = 0
+    ) -> None:
+        import strategy_io
+
+        stats = self.stats
+        strategies = self.iter_strategies(dedupe_window, max_workers, frontier_depth, disjoint, memoize)
+        if stats is not None:
+            strategies = stats.timed(strategies, "traverse")
+
+        if minimize_passes:
+            with stats.phase("minimize") if stats is not None else nullcontext():
+                strategies = minimize(strategies, minimize_passes)
+
+        if stats is None:
+            strategy_io.write(strategies, output_file_path, output_format, sort_chunk_size)
+            return
+
+        with stats.phase("write"):
+            strategy_io.write(
+                stats.count(strategies, "strategies_written"), output_file_path, output_format, sort_chunk_size
+            )
+
+    @classmethod
+    def write_strategies_pipelined(
+        cls,
+        input_file_path: str,
+        output_file_path: str,
+        dedupe_window: int | None = None,
+        minimize_passes: int = 0,
+        disjoint: bool = False,
+        output_format: str = "text",
+        sort_chunk_size: int = 0,
+        use_mmap: bool = False,
+        integral_variables: frozenset[str] = frozenset(),
+        stats: Stats | None = None,
+        queue_size: int = PIPELINE_QUEUE_SIZE
+    ) -> None:
+        # Parses, traverses and writes at the same time: a reader thread publishes parsed nodes, the traversal runs
+        # here and waits for a node only when it reaches it before the reader, and a writer thread drains the
+        # strategies. The bounded queue blocks the traversal when the writer falls behind
+        import queue
+        import threading
+
+        # The root is only known once the reader has parsed node 0, the traversal resolves nodes by id
+        tree = cls(None, ConditionFactory(), stats, integral_variables)
+        nodes = _NodeMap()
+        batches = queue.Queue(maxsize=queue_size)
+        writer_errors = []
+
+        reader = threading.Thread(
+            target=_read_nodes, args=(nodes, input_file_path, use_mmap, tree.condition_factory, stats), daemon=True
+        )
+        writer = threading.Thread(
+            target=_write_batches,
+            args=(batches, output_file_path, output_format, sort_chunk_size, stats, writer_errors),
+            daemon=True
+        )
 
-    def write_strategies(self, output_file_path: str) -> None:
-        with open(output_file_path, 'w') as strategies_file:
-            for strategy in self.get_strategies():
-                strategies_file.write(f"{strategy}\n")
+        with stats.phase("pipeline") if stats is not None else nullcontext():
+            reader.start()
+            writer.start()
+            try:
+                strategies = tree._expand_pipelined(nodes, initial_state(integral_variables), disjoint)
+                if dedupe_window != 0:
+                    strategies = deduplicate(strategies, dedupe_window, stats)
+                if minimize_passes:
+                    strategies = minimize(strategies, minimize_passes)
+
+                batch = []
+                for strategy in strategies:
+                    batch.append(strategy)
+                    if len(batch) == PIPELINE_BATCH_SIZE:
+                        batches.put(batch)
+                        batch = []
+                if batch:
+                    batches.put(batch)
+            finally:
+                batches.put(None)
+                writer.join()
+            reader.join()
+
+        if writer_errors:
+            raise writer_errors[0]
+
+    def _expand_pipelined(self, nodes: "_NodeMap", state: PathState, disjoint: bool = False) -> Iterator[Strategy]:
+        # Same walk as _expand over unlinked nodes, branches hold child ids that are looked up as they are reached
+        # Same error as from_nodes when the file has no root
+        if nodes.get(0) is None:
+            raise KeyError(0)
+
+        stats = self.stats
+        stack = [(0, state)]
+
+        while stack:
+            node_id, state = stack.pop()
+            node = nodes.get(node_id)
+
+            if isinstance(node, LeafNode):
+                if stats is not None:
+                    stats.prune_calls += 1
+                yield Strategy.from_state(state, node.value)
+            elif isinstance(node, ConditionNode):
+                stack.extend(self._branches(node, state, disjoint))
 
     def __str__(self) -> str:
         def recursive_str(node, depth=0):
@@ -161,18 +819,349 @@ class StrategyTree:
             return False
         return self.root == other.root
 
+# Nodes by id of the tree a worker process expands subtrees of, set once per worker by _init_worker
+_WORKER_NODES: Dict[int, TreeNode] = {}
+
+def _init_worker(compact_tree: "CompactStrategyTree") -> None:
+    nodes = list(compact_tree.iter_nodes())
+    StrategyTree.from_nodes(nodes)
+    _WORKER_NODES.clear()
+    _WORKER_NODES.update((node.id, node) for node in nodes)
+
+def _expand_subtree(
+    node_id: int, state: PathState, disjoint: bool, memoize: bool = False, collect_stats: bool = False
+) -> Tuple[List[Strategy], Stats | None]:
+    # Process pool entry point, module level so that it can be pickled. Worker counters are merged by the parent
+    node = _WORKER_NODES[node_id]
+    tree = StrategyTree(node, stats=Stats() if collect_stats else None)
+    return list(tree._expand(node, state, disjoint, memoize)), tree.stats
+
+class _NodeMap:
+    # Unlinked nodes by id, filled by the reader thread of a pipelined run. get() waits until the node is
+    # published, or returns None once the whole file was read without it
+
+    def __init__(self):
+        import threading
+
+        self.nodes: Dict[int, TreeNode] = {}
+        self.done = False
+        self.error: BaseException | None = None
+        self.available = threading.Condition()
+
+    def publish(self, nodes: List[TreeNode]) -> None:
+        with self.available:
+            self.nodes.update((node.id, node) for node in nodes)
+            self.available.notify_all()
+
+    def close(self, error: BaseException | None = None) -> None:
+        with self.available:
+            self.done, self.error = True, error
+            self.available.notify_all()
+
+    def get(self, node_id: int) -> TreeNode | None:
+        node = self.nodes.get(node_id)
+        if node is None:
+            with self.available:
+                while (node := self.nodes.get(node_id)) is None and not self.done:
+                    self.available.wait()
+        if self.error is not None:
+            raise self.error
+        return node
+
+def _read_nodes(
+    nodes: _NodeMap, file_path: str, use_mmap: bool, condition_factory: ConditionFactory, stats: Stats | None
+) -> None:
+    # Nodes are published in batches, waking the traversal once per node would cost more than the parsing
+    try:
+        with nullcontext(None) if use_mmap else open(file_path, 'r') as file:
+            parsed = (
+                StrategyTree.iter_nodes_mmap(file_path, condition_factory) if use_mmap
+                else StrategyTree.iter_nodes(file, condition_factory)
+            )
+            if stats is not None:
+                parsed = stats.count(parsed, "nodes_parsed")
+
+            batch = []
+            for node in parsed:
+                batch.append(node)
+                if len(batch) == PIPELINE_BATCH_SIZE:
+                    nodes.publish(batch)
+                    batch = []
+            nodes.publish(batch)
+    except BaseException as error:
+        nodes.close(error)
+        return
+    nodes.close()
+
+def _write_batches(
+    batches: "queue.Queue[List[Strategy] | None]",
+    output_file_path: str,
+    output_format: str,
+    sort_chunk_size: int,
+    stats: Stats | None,
+    errors: List[BaseException]
+) -> None:
+    import strategy_io
+
+    finished = False
+
+    def strategies() -> Iterator[Strategy]:
+        nonlocal finished
+        while (batch := batches.get()) is not None:
+            yield from batch
+        finished = True
+
+    try:
+        strategy_io.write(
+            strategies() if stats is None else stats.count(strategies(), "strategies_written"),
+            output_file_path,
+            output_format,
+            sort_chunk_size
+        )
+    except BaseException as error:
+        errors.append(error)
+        # Keep draining so that the traversal never blocks on a full queue
+        while not finished and batches.get() is not None:
+            pass
+
 def get_arg_parser() -> argparse.ArgumentParser:
 
     parser = argparse.ArgumentParser(description="Deserializes a DV tree file into a binary Tree and writes the strategies into a file")
-    parser.add_argument("-f", "--dv-tree-file-path", type=str, required=True, help="Path to the DV tree file")
-    parser.add_argument("-o", "--strategies-file-path", type=str, default="strategies.txt", help="Path to output strategies file (default=strategies.txt)")
+    parser.add_argument("-f", "--dv-tree-file-path", type=str, default=None, help="Path to the DV tree file, or a directory or glob pattern of DV tree files processed in batch")
+    parser.add_argument("--manifest", type=str, default=None, help="File listing one DV tree file path per line, processed in batch")
+    parser.add_argument("-o", "--strategies-file-path", type=str, default=None, help="Path to output strategies file (default=strategies.txt), or output directory in batch mode (default=strategies)")
+    parser.add_argument("--report", type=str, default=None, help="In batch mode, write a JSON report with per-file timing and failures to this file")
+    parser.add_argument("--mmap", action="store_true", help="Memory-map the DV tree file and parse it as bytes")
+    parser.add_argument("--dedupe-window", type=int, default=None, help="Only deduplicate against the last N written strategies, 0 disables deduplication (default=all)")
+    parser.add_argument("--minimize", type=int, nargs="?", const=MINIMIZE_PASSES, default=0, metavar="PASSES", help=f"Merge strategies into a smaller equivalent set, in at most PASSES passes (default={MINIMIZE_PASSES})")
+    parser.add_argument("--disjoint-or", action="store_true", help="Expand OR conditions into non-overlapping strategies (c1; !c1 & c2; ...)")
+    parser.add_argument("--memoize", action="store_true", help="Reuse the strategies of subtrees shared by several parents")
+    parser.add_argument("--integral-features", type=str, default=None, help="Comma separated features that only take integer values, e.g. x>5 && x<6 is then dropped as empty")
+    parser.add_argument("--format", choices=("text", "jsonl", "binary"), default="text", help="Output format of the strategies (default=text)")
+    parser.add_argument("--sort", type=int, nargs="?", const=SORT_CHUNK_SIZE, default=0, metavar="CHUNK", help=f"Write strategies and their conditions in a canonical order, sorting at most CHUNK strategies in memory and merging sorted runs from temporary files beyond that (default={SORT_CHUNK_SIZE})")
+    parser.add_argument("--subtree-cache", type=str, default=None, help="Reuse the strategies of unchanged subtrees from the cache file of the previous run, and update it")
+    parser.add_argument("--diff", type=str, default=None, help="With --subtree-cache, write the strategies added (+) and removed (-) since the previous run to this file")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Reuse the parsed tree and the strategies of previous runs on the same file and options from this directory")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Size of the cache directory in MB before the least recently used entries are evicted (default=1024)")
+    parser.add_argument("--stats", action="store_true", help="Print counters, per-phase wall times and peak memory to stderr")
+    parser.add_argument("--pipeline", action="store_true", help="Parse, traverse and write at the same time in separate threads, with a bounded queue in front of the writer")
+    parser.add_argument("--compact", action="store_true", help="Load the tree into the array-backed compact representation")
+    parser.add_argument("--forest", action="store_true", help="Treat the file as a booster[i]: delimited ensemble of trees")
+    parser.add_argument("--split-trees", action="store_true", help="With --forest, write one strategies file per tree")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes, files processed in parallel in batch mode (default=cpu count with --forest or in batch mode, serial otherwise)")
+    parser.add_argument("--frontier-depth", type=int, default=FRONTIER_DEPTH, help=f"Depth at which subtrees are handed to workers (default={FRONTIER_DEPTH})")
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if (args.dv_tree_file_path is None) == (args.manifest is None):
+        parser.error("exactly one of -f/--dv-tree-file-path and --manifest is required")
+
+    from strategy_batch import is_batch_input
+
+    args.batch = args.manifest is not None or is_batch_input(args.dv_tree_file_path)
+    if args.batch and (args.subtree_cache or args.diff):
+        parser.error("--subtree-cache and --diff keep the state of a single file, they cannot be used in batch mode")
+    if args.strategies_file_path is None:
+        args.strategies_file_path = "strategies" if args.batch else "strategies.txt"
+    return args
 
 def main():
+    import sys
+
     args = get_arg_parser()
-    tree = StrategyTree.from_file(args.dv_tree_file_path)
-    tree.write_strategies(args.strategies_file_path)
+    if args.batch:
+        from strategy_batch import run_batch
+
+        report = run_batch(args)
+        print(report, file=sys.stderr)
+        if args.stats:
+            stats = Stats()
+            for result in report.results:
+                if result.stats is not None:
+                    stats.merge(result.stats)
+                    stats.peak_memory = max(stats.peak_memory, result.stats.peak_memory)
+            print(stats, file=sys.stderr)
+        if report.failures:
+            sys.exit(1)
+        return
+
+    stats = Stats() if args.stats else None
+
+    try:
+        run_cached(args, stats)
+    finally:
+        if stats is not None:
+            print(stats, file=sys.stderr)
+
+def run_cached(args: argparse.Namespace, stats: Stats | None = None) -> None:
+    # Runs writing several files or keeping their own state are not cached
+    if not args.cache_dir or args.split_trees or args.subtree_cache:
+        run(args, stats=stats)
+        return
+
+    from result_cache import ResultCache
+
+    cache = ResultCache(args.cache_dir, max_size=args.cache_size << 20)
+    options = {
+        name: value for name, value in vars(args).items()
+        if name not in ("dv_tree_file_path", "strategies_file_path", "cache_dir", "cache_size", "mmap", "stats")
+    }
+    output_key = cache.key(args.dv_tree_file_path, **options)
+
+    if not cache.restore_output(output_key, args.strategies_file_path):
+        run(args, cache, stats)
+        cache.store_output(output_key, args.strategies_file_path)
+
+def load_tree(
+    args: argparse.Namespace, cache: "ResultCache | None" = None, stats: Stats | None = None
+) -> "StrategyTree | CompactStrategyTree":
+    from compact_tree import CompactStrategyTree
+
+    if cache is None and not args.compact:
+        return StrategyTree.from_file(args.dv_tree_file_path, use_mmap=args.mmap, stats=stats)
+
+    def parse() -> CompactStrategyTree:
+        return CompactStrategyTree.from_file(args.dv_tree_file_path, use_mmap=args.mmap, stats=stats)
+
+    with stats.phase("parse") if stats is not None else nullcontext():
+        # The cache keeps the array-backed form, it pickles without recursion and loads quickly. A cached tree
+        # was not parsed, nodes_parsed stays 0 on a warm run
+        tree = parse() if cache is None else cache.load_tree(args.dv_tree_file_path, parse)
+        if not args.compact:
+            tree = tree.to_tree()
+    # Attached after loading so that the cached tree does not carry it
+    tree.stats = stats
+    return tree
+
+def reject_options(mode: str, options: Iterable[Tuple[str, Any]]) -> None:
+    ignored = [option for option, value in options if value]
+    if ignored:
+        raise ValueError(f"{mode}, it cannot be combined with {', '.join(ignored)}")
+
+def run(args: argparse.Namespace, cache: "ResultCache | None" = None, stats: Stats | None = None) -> None:
+    if args.pipeline:
+        if args.forest or args.compact or args.subtree_cache or args.memoize or (args.workers or 1) != 1:
+            raise ValueError(
+                "--pipeline streams a single tree serially, it cannot be combined with --forest, --compact, "
+                "--subtree-cache, --memoize or --workers"
+            )
+
+        StrategyTree.write_strategies_pipelined(
+            args.dv_tree_file_path,
+            args.strategies_file_path,
+            dedupe_window=args.dedupe_window,
+            minimize_passes=args.minimize,
+            disjoint=args.disjoint_or,
+            output_format=args.format,
+            sort_chunk_size=args.sort,
+            use_mmap=args.mmap,
+            integral_variables=frozenset(args.integral_features.split(",")) if args.integral_features else frozenset(),
+            stats=stats
+        )
+        return
+
+    if args.forest:
+        from strategy_forest import StrategyForest
+
+        reject_options(
+            "--forest extracts every tree with the default expansion", (
+                ("--mmap", args.mmap),
+                ("--dedupe-window", args.dedupe_window is not None),
+                ("--minimize", args.minimize),
+                ("--disjoint-or", args.disjoint_or),
+                ("--integral-features", args.integral_features),
+                ("--memoize", args.memoize),
+                ("--compact", args.compact),
+            )
+        )
+
+        with stats.phase("extract") if stats is not None else nullcontext():
+            forest = StrategyForest.from_file(args.dv_tree_file_path, stats)
+            forest.write_strategies(
+                args.strategies_file_path,
+                split=args.split_trees,
+                max_workers=args.workers,
+                output_format=args.format,
+                sort_chunk_size=args.sort
+            )
+        return
+
+    if args.compact:
+        reject_options(
+            "--compact walks the tree serially without memoization", (
+                ("--workers", (args.workers or 1) != 1),
+                ("--frontier-depth", args.frontier_depth != FRONTIER_DEPTH),
+                ("--memoize", args.memoize),
+                ("--subtree-cache", args.subtree_cache),
+            )
+        )
+    if args.subtree_cache:
+        reject_options(
+            "--subtree-cache walks the tree serially and keeps every strategy", (
+                ("--workers", (args.workers or 1) != 1),
+                ("--frontier-depth", args.frontier_depth != FRONTIER_DEPTH),
+                ("--memoize", args.memoize),
+                ("--dedupe-window", args.dedupe_window is not None),
+            )
+        )
+
+    tree = load_tree(args, cache, stats)
+    if args.integral_features:
+        tree.integral_variables = frozenset(args.integral_features.split(","))
+
+    if args.compact:
+        with stats.phase("extract") if stats is not None else nullcontext():
+            tree.write_strategies(
+                args.strategies_file_path,
+                dedupe_window=args.dedupe_window,
+                minimize_passes=args.minimize,
+                disjoint=args.disjoint_or,
+                output_format=args.format,
+                sort_chunk_size=args.sort
+            )
+        return
+
+    if args.subtree_cache:
+        import strategy_io
+        from subtree_cache import SubtreeCache
+
+        with stats.phase("extract") if stats is not None else nullcontext():
+            subtree_cache = SubtreeCache.load(args.subtree_cache)
+            strategies, diff = subtree_cache.extract(tree, disjoint=args.disjoint_or)
+            # Nothing to write back when every subtree was found in the cache
+            if subtree_cache.modified:
+                subtree_cache.save(args.subtree_cache)
+
+            if args.minimize:
+                strategies = minimize(strategies, args.minimize)
+
+            if stats is None:
+                strategy_io.write(strategies, args.strategies_file_path, args.format, args.sort)
+            else:
+                with stats.phase("write"):
+                    strategy_io.write(
+                        stats.count(strategies, "strategies_written"), args.strategies_file_path, args.format, args.sort
+                    )
+
+        if args.diff:
+            with open(args.diff, 'w') as diff_file:
+                diff_file.write(f"{diff}\n" if diff else "")
+        return
+
+    tree.write_strategies(
+        args.strategies_file_path,
+        dedupe_window=args.dedupe_window,
+        max_workers=args.workers or 1,
+        frontier_depth=args.frontier_depth,
+        minimize_passes=args.minimize,
+        disjoint=args.disjoint_or,
+        memoize=args.memoize,
+        output_format=args.format,
+        sort_chunk_size=args.sort
+    )
 
 if __name__ == "__main__":
-    main()
+    # Run through the imported module: run as a script, this file is __main__ and the other modules import a second
+    # copy of it, whose node classes would not match the ones built here
+    import strategy_tree
+
+    strategy_tree.main()
@@ -0,0 +1,243 @@
+import pickle
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Self, Set, Tuple
+
+from conditions import Condition
+from strategy import Strategy, initial_state
+from strategy_tree import StrategyTree
+
+# (subtree content hash, path state projected on the subtree's variables)
+SuffixKey = Tuple[bytes, frozenset]
+
+# Bumped whenever the layout of the saved cache changes, a cache in another format is started over
+CACHE_FORMAT = 3
+# Suffixes are only kept for the root and for the subtrees of at least MIN_CUT_SIZE nodes. Smaller subtrees are
+# walked again, which is cheaper than storing and merging their suffixes
+MIN_CUT_SIZE = 64
+
+@dataclass
+class StrategyDiff:
+    added: Set[Strategy] = field(default_factory=set)
+    removed: Set[Strategy] = field(default_factory=set)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed)
+
+    def __str__(self) -> str:
+        return "\n".join(
+            [f"+ {strategy}" for strategy in self.added] + [f"- {strategy}" for strategy in self.removed]
+        )
+
+class _RunSuffixes(dict):
+    # Suffixes produced during one extraction, falling back to the previous run's entries
+
+    def __init__(self, previous: Dict[SuffixKey, List[Strategy]]):
+        super().__init__()
+        self.previous = previous
+        self.hits = 0
+
+    def get(self, key, default=None):
+        suffixes = super().get(key)
+        if suffixes is None:
+            suffixes = self.previous.get(key)
+            if suffixes is None:
+                return default
+            self.hits += 1
+            self[key] = suffixes
+        return suffixes
+
+class _StrategyTable:
+    # Distinct strategies as flat arrays: their values, and their conditions as ids into a list of distinct conditions.
+    # Strategies and conditions are told apart by identity (the tree's conditions are interned by its
+    # ConditionFactory), which keeps hashing out of encoding. The table only grows, the strategies of a loaded cache
+    # keep their ids and a save only encodes the new ones
+
+    def __init__(
+        self,
+        conditions: List[Condition] | None = None,
+        values: array | None = None,
+        condition_offsets: array | None = None,
+        condition_ids: array | None = None
+    ):
+        self.conditions = conditions if conditions is not None else []
+        self.values = values if values is not None else array("d")
+        self.condition_offsets = condition_offsets if condition_offsets is not None else array("q", [0])
+        self.condition_ids = condition_ids if condition_ids is not None else array("I")
+        self.condition_index = dict(zip(map(id, self.conditions), range(len(self.conditions))))
+        # Strategies decoded or encoded so far, they keep the ids of strategy_index alive
+        self.strategies: List[Strategy | None] = [None] * len(self.values)
+        self.strategy_index: Dict[int, int] = {}
+        self.undecoded = set(range(len(self.values)))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def decode(self, strategy_ids: array) -> List[Strategy]:
+        missing = self.undecoded.intersection(strategy_ids)
+        for strategy_id in missing:
+            start, end = self.condition_offsets[strategy_id], self.condition_offsets[strategy_id + 1]
+            strategy = self.strategies[strategy_id] = Strategy(
+                conditions=frozenset(map(self.conditions.__getitem__, self.condition_ids[start:end])),
+                value=self.values[strategy_id]
+            )
+            self.strategy_index[id(strategy)] = strategy_id
+        self.undecoded -= missing
+        return list(map(self.strategies.__getitem__, strategy_ids))
+
+    def encode(self, strategies: List[Strategy]) -> array:
+        from itertools import accumulate, chain
+
+        distinct = dict(zip(map(id, strategies), strategies))
+        new = [distinct[key] for key in distinct.keys() - self.strategy_index.keys()]
+        if new:
+            self.strategy_index.update(zip(map(id, new), range(len(self.values), len(self.values) + len(new))))
+            self.strategies.extend(new)
+            self.values.extend(strategy.value for strategy in new)
+            offsets = accumulate((len(strategy.conditions) for strategy in new), initial=self.condition_offsets[-1])
+            # The first offset is the end of the last strategy already in the table
+            next(offsets)
+            self.condition_offsets.extend(offsets)
+
+            conditions = list(chain.from_iterable(strategy.conditions for strategy in new))
+            distinct_conditions = dict(zip(map(id, conditions), conditions))
+            for key in distinct_conditions.keys() - self.condition_index.keys():
+                self.condition_index[key] = len(self.conditions)
+                self.conditions.append(distinct_conditions[key])
+            self.condition_ids.extend(map(self.condition_index.__getitem__, map(id, conditions)))
+
+        return array("I", map(self.strategy_index.__getitem__, map(id, strategies)))
+
+class _StoredSuffixes(dict):
+    # Suffixes read back from a cache file, each entry as an array of ids into the strategy table. An entry is only
+    # turned back into strategies when it is looked up, so a run over a mostly unchanged tree decodes a handful of
+    # them, and the entries that were not looked up are saved again as they are
+
+    def __init__(self, entries: Dict[SuffixKey, array], table: _StrategyTable):
+        super().__init__(entries)
+        self.table = table
+
+    def __getitem__(self, key: SuffixKey) -> List[Strategy]:
+        suffixes = super().__getitem__(key)
+        if isinstance(suffixes, array):
+            suffixes = self[key] = self.table.decode(suffixes)
+        return suffixes
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+def _cut_ids(tree: StrategyTree, min_size: int) -> Set[int]:
+    # The root and the subtrees of at least min_size nodes
+    cuts = {node_id for node_id, size in tree.subtree_sizes().items() if size >= min_size}
+    if tree.root is not None:
+        cuts.add(tree.root.id)
+    return cuts
+
+@dataclass
+class SubtreeCache:
+    # Strategy suffixes of the cut subtrees, by content hash and projected path state. A retrained tree only
+    # re-enumerates the cut subtrees whose hash changed, the unchanged ones are looked up
+    suffixes: Dict[SuffixKey, List[Strategy]] = field(default_factory=dict)
+    root: SuffixKey | None = None
+    disjoint: bool = False
+    hits: int = 0
+    misses: int = 0
+    # Whether the last extract changed anything that save would write
+    modified: bool = False
+
+    def strategies(self) -> Set[Strategy]:
+        if self.root is None:
+            return set()
+        return set(self.suffixes[self.root])
+
+    def extract(
+        self, tree: StrategyTree, disjoint: bool = False, min_cut_size: int = MIN_CUT_SIZE
+    ) -> Tuple[Set[Strategy], StrategyDiff]:
+        # Suffixes depend on the expansion mode, a cache built in the other mode is not reused
+        if disjoint != self.disjoint:
+            self.suffixes, self.root, self.disjoint = {}, None, disjoint
+
+        previous_root = self.root
+        hashes = tree.subtree_hashes()
+        run_suffixes = _RunSuffixes(self.suffixes)
+
+        state = initial_state(tree.integral_variables)
+        expanded = list(tree._expand_memoized(
+            tree.root, state, disjoint, run_suffixes, lambda node: hashes[node.id], _cut_ids(tree, min_cut_size)
+        ))
+
+        # The root is keyed by the initial state projected on its variables, a leaf root is not memoized by the
+        # traversal and gets an entry of its own
+        root_hash = hashes[tree.root.id]
+        root = next((key for key in run_suffixes if key[0] == root_hash), (root_hash, frozenset()))
+        self.hits = run_suffixes.hits
+        self.misses = len(run_suffixes) - run_suffixes.hits
+
+        # The root itself was a hit when the tree is unchanged, its strategies are those of the previous run
+        unchanged = root == previous_root and run_suffixes.get(root) is self.suffixes.get(root)
+        # Strategies are compared by conditions and value, Strategy.__eq__ is slow on large sets
+        previous = {} if unchanged or previous_root is None else {
+            (strategy.conditions, strategy.value): strategy for strategy in self.suffixes[previous_root]
+        }
+
+        # Entries of subtrees that no longer exist are dropped, the others stay available for the next run even
+        # when they were not reached this time (their cached ancestor was hit first)
+        live = set(hashes.values())
+        dropped = [key for key in self.suffixes if key[0] not in live]
+        for key in dropped:
+            del self.suffixes[key]
+
+        self.modified = not unchanged or bool(self.misses or dropped)
+        if unchanged:
+            return set(expanded), StrategyDiff()
+
+        current = {(strategy.conditions, strategy.value): strategy for strategy in expanded}
+        strategies = set(current.values())
+
+        self.suffixes.update(run_suffixes)
+        # The root entry keeps each strategy once
+        self.root = root
+        self.suffixes[root] = list(strategies)
+
+        return strategies, StrategyDiff(
+            added={strategy for key, strategy in current.items() if key not in previous},
+            removed={strategy for key, strategy in previous.items() if key not in current}
+        )
+
+    def save(self, file_path: str) -> None:
+        table = self.suffixes.table if isinstance(self.suffixes, _StoredSuffixes) else _StrategyTable()
+        # Entries still in their stored form are written back as they are
+        entries = {
+            key: suffixes if isinstance(suffixes, array) else table.encode(suffixes)
+            for key, suffixes in self.suffixes.items()
+        }
+        # The table keeps the strategies of dropped entries, it is rebuilt once they are the majority
+        if len(table) > 2 * len(set().union(*entries.values())):
+            self.suffixes = {key: self.suffixes[key] for key in self.suffixes}
+            table = _StrategyTable()
+            entries = {key: table.encode(suffixes) for key, suffixes in self.suffixes.items()}
+
+        with open(file_path, 'wb') as file:
+            pickle.dump(
+                (
+                    CACHE_FORMAT, self.root, self.disjoint,
+                    table.conditions, table.values, table.condition_offsets, table.condition_ids, entries
+                ),
+                file, protocol=pickle.HIGHEST_PROTOCOL
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> Self:
+        from os import path
+
+        if not path.exists(file_path):
+            return cls()
+
+        with open(file_path, 'rb') as file:
+            saved = pickle.load(file)
+        if not isinstance(saved, tuple) or saved[0] != CACHE_FORMAT:
+            return cls()
+
+        _, root, disjoint, conditions, values, condition_offsets, condition_ids, entries = saved
+        table = _StrategyTable(conditions, values, condition_offsets, condition_ids)
+        return cls(_StoredSuffixes(entries, table), root, disjoint)
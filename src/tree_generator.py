@@ -0,0 +1,83 @@
+import argparse
+import random
+from typing import Iterator, Mapping
+
+from strategy_tree import StrategyTree
+
+OPERATOR_MIX = {"=": 0.5, "!=": 0.3, ">": 0.1, "<": 0.1}
+
+def generate_lines(
+    depth: int,
+    or_fanout: int = 1,
+    variables: int = 10,
+    cardinality: int = 10,
+    operators: Mapping[str, float] = OPERATOR_MIX,
+    leaf_probability: float = 0.0,
+    seed: int = 0
+) -> Iterator[str]:
+    # Lines in the from_string format. Every condition node has between 1 and or_fanout OR conditions on
+    # f0..f{variables - 1} with values in 0..cardinality - 1, operators are drawn with the given weights.
+    # Below the root, a node becomes a leaf early with leaf_probability, otherwise leaves are at depth
+    unsupported = set(operators) - set(StrategyTree.CONDITION_CLASSES)
+    if unsupported:
+        raise ValueError(f"Unsupported operators: {', '.join(sorted(unsupported))}")
+    if depth < 0 or or_fanout < 1 or variables < 1 or cardinality < 1:
+        raise ValueError("depth must be >= 0, or_fanout, variables and cardinality >= 1")
+
+    rng = random.Random(seed)
+    operator_choices, operator_weights = list(operators), list(operators.values())
+    next_id = 1
+    stack = [(0, 0)]
+
+    while stack:
+        node_id, node_depth = stack.pop()
+        if node_depth == depth or (node_depth and rng.random() < leaf_probability):
+            yield f"{node_id}:leaf={rng.random():.6f}"
+            continue
+
+        conditions = "||or||".join(
+            f"f{rng.randrange(variables)}"
+            f"{rng.choices(operator_choices, operator_weights)[0]}"
+            f"{rng.randrange(cardinality)}"
+            for _ in range(rng.randint(1, or_fanout))
+        )
+        yield f"{node_id}:[{conditions}] yes={next_id},no={next_id + 1}"
+        stack.extend(((next_id + 1, node_depth + 1), (next_id, node_depth + 1)))
+        next_id += 2
+
+def generate(depth: int, **parameters) -> str:
+    return "\n".join(generate_lines(depth, **parameters))
+
+def generate_tree(depth: int, **parameters) -> StrategyTree:
+    return StrategyTree.from_lines(generate_lines(depth, **parameters))
+
+def parse_operators(operators: str) -> dict:
+    # "=:5,!=:3,>:1" -> {"=": 5.0, "!=": 3.0, ">": 1.0}
+    mix = {}
+    for item in operators.split(","):
+        operator, _, weight = item.rpartition(":")
+        mix[operator] = float(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a random DV tree file")
+    parser.add_argument("-o", "--output-file-path", type=str, required=True, help="Path to the generated tree file")
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--or-fanout", type=int, default=1, help="Maximum number of OR conditions per node")
+    parser.add_argument("--variables", type=int, default=10)
+    parser.add_argument("--cardinality", type=int, default=10, help="Number of distinct values per variable")
+    parser.add_argument("--operators", type=parse_operators, default=OPERATOR_MIX, help="Operator weights, e.g. '=:5,!=:3,>:1,<:1'")
+    parser.add_argument("--leaf-probability", type=float, default=0.0, help="Probability for a node to be an early leaf")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.output_file_path, 'w') as file:
+        file.writelines(
+            f"{line}\n" for line in generate_lines(
+                args.depth, args.or_fanout, args.variables, args.cardinality,
+                args.operators, args.leaf_probability, args.seed
+            )
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import pytest
+from compact_tree import CompactStrategyTree, NO_NODE
+from strategy_tree import StrategyTree
+from conditions import OPERATORS, EqualsCondition, NotEqualsCondition
+
+class TestCompactStrategyTree:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path):
+        from os import path
+
+        self.tree_path = path.join(resources_path, "tree_to_convert__288_29.txt")
+        self.tree = StrategyTree.from_file(self.tree_path)
+        self.compact_tree = CompactStrategyTree.from_file(self.tree_path)
+
+    def test_compact_tree_constructor(self):
+        assert len(self.compact_tree) == 21
+        assert self.compact_tree.ids[self.compact_tree.root] == 0
+        assert len(self.compact_tree.condition_offsets) == len(self.compact_tree) + 1
+        assert set(self.compact_tree.variables) == {
+            "device_type", "browser", "os_family", "language", "size", "position", "region"
+        }
+
+    def test_compact_tree_layout(self):
+        root = self.compact_tree.root
+
+        assert self.compact_tree.conditions(root) == [
+            EqualsCondition("device_type", "pc"),
+            EqualsCondition("browser", 7)
+        ]
+        assert {OPERATORS[code] for code in self.compact_tree.condition_operators} == {"="}
+        assert self.compact_tree.ids[self.compact_tree.true_branches[root]] == 2
+        assert self.compact_tree.ids[self.compact_tree.false_branches[root]] == 1
+
+        leaf = self.compact_tree.true_branches[self.compact_tree.false_branches[root]]
+        assert self.compact_tree.is_leaf(leaf)
+        assert self.compact_tree.leaf_values[leaf] == 0.000881108
+        assert self.compact_tree.true_branches[leaf] == NO_NODE
+
+    def test_compact_tree_round_trip(self):
+        assert self.compact_tree.to_tree() == self.tree
+        assert CompactStrategyTree.from_tree(self.tree).to_tree() == self.tree
+        assert CompactStrategyTree.from_file(self.tree_path, use_mmap=True).to_tree() == self.tree
+
+    def test_compact_tree_get_strategies(self, resources_path):
+        from os import path
+
+        assert self.compact_tree.get_strategies() == self.tree.get_strategies()
+
+        simple_tree_path = path.join(resources_path, "simple_tree.txt")
+        assert CompactStrategyTree.from_file(simple_tree_path).get_strategies() == (
+            StrategyTree.from_file(simple_tree_path).get_strategies()
+        )
+
+    def test_compact_tree_prunes_contradicting_subtrees(self):
+        content = (
+            "0:[phone=5] yes=1,no=2\n1:[phone=7||or||phone=5] yes=3,no=4\n3:[a=1] yes=5,no=6\n"
+            "2:leaf=1\n4:leaf=2\n5:leaf=3\n6:leaf=4"
+        )
+        strategies = CompactStrategyTree.from_string(content).get_strategies()
+
+        assert strategies == StrategyTree.from_string(content).get_strategies()
+        assert len(strategies) == 3
+
+    def test_compact_tree_disjoint_strategies(self):
+        content = (
+            "0:[a=1||or||b=2||or||a=1] yes=1,no=2\n1:[b=2] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3"
+        )
+        strategies = CompactStrategyTree.from_string(content).get_strategies(disjoint=True)
+
+        assert strategies == StrategyTree.from_string(content).get_strategies(disjoint=True)
+        assert len(strategies) == 4
+        assert self.compact_tree.get_strategies(disjoint=True) == self.tree.get_strategies(disjoint=True)
+
+    def test_compact_tree_missing_child(self):
+        compact_tree = CompactStrategyTree.from_string("0:[browser=8] yes=1,no=2\n1:leaf=0.5")
+        strategies = compact_tree.get_strategies()
+
+        assert compact_tree.false_branches[compact_tree.root] == NO_NODE
+        assert [strategy.conditions for strategy in strategies] == [frozenset([EqualsCondition("browser", 8)])]
+        assert NotEqualsCondition("browser", 8) not in next(iter(strategies)).conditions
+
+    def test_compact_tree_write_strategies(self, tmp_path):
+        output_path = tmp_path / "strategies.txt"
+        self.compact_tree.write_strategies(str(output_path))
+
+        def normalize(line: str) -> tuple:
+            conditions, value = line.removeprefix("if (").split(") then ")
+            return frozenset(conditions.split(" && ")), value
+
+        assert {normalize(line) for line in output_path.read_text().splitlines()} == {
+            normalize(f"{strategy}") for strategy in self.tree.get_strategies()
+        }
+
+    def test_compact_tree_keeps_value_types(self, tmp_path, monkeypatch):
+        import sys
+        from strategy_tree import get_arg_parser, run_cached
+
+        tree_path = tmp_path / "tree.txt"
+        tree_path.write_text("0:[y<5] yes=1,no=2\n1:[z<5.0||or||x=1] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3")
+        compact_tree = CompactStrategyTree.from_file(str(tree_path))
+
+        assert [type(value) for value in compact_tree.values] == [int, float, int]
+        assert compact_tree.get_strategies() == StrategyTree.from_file(str(tree_path)).get_strategies()
+
+        outputs = {}
+        for name, options in {
+            "plain": [], "compact": ["--compact"], "cache": ["--cache-dir", str(tmp_path / "cache")]
+        }.items():
+            output_path = tmp_path / f"{name}.txt"
+            monkeypatch.setattr(sys, "argv", ["dv_strategies", "-f", str(tree_path), "-o", str(output_path), "--sort", *options])
+            run_cached(get_arg_parser())
+            outputs[name] = output_path.read_bytes()
+
+        assert b"z<5.0" in outputs["plain"]
+        assert outputs["compact"] == outputs["plain"]
+        assert outputs["cache"] == outputs["plain"]
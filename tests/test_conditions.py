@@ -1,5 +1,6 @@
 import pytest
 from conditions import (
+    ConditionFactory, CONDITION_CLASSES, OPERATORS, NEGATIONS,
     EqualsCondition, NotEqualsCondition,
     GreaterThanCondition, GreaterThanOrEqualCondition,
     LessThanCondition, LessThanOrEqualCondition
@@ -159,7 +160,7 @@ class TestGreaterThanOrEqualCondition:
         assert not self.condition.contradicts(GreaterThanOrEqualCondition("test", 60))
 
         assert self.condition.contradicts(LessThanCondition("test", 40))
-        assert not self.condition.contradicts(LessThanCondition("test", 50))
+        assert self.condition.contradicts(LessThanCondition("test", 50))
         assert not self.condition.contradicts(LessThanCondition("test", 60))
 
         assert self.condition.contradicts(LessThanOrEqualCondition("test", 40))
@@ -250,3 +251,81 @@ class TestLessThanOrEqualCondition:
     
     def test_condition_str(self):
         assert str(self.condition) == "test<=50"
+
+class TestContradictions:
+
+    def test_contradicts_is_symmetric_and_exact(self):
+        from itertools import product
+
+        # A pair contradicts exactly when no value satisfies both, half values stand in for reals between ints
+        values = [value / 2 for value in range(-2, 11)]
+        for (left_class, left_value), (right_class, right_value) in product(
+            product(CONDITION_CLASSES, range(4)), repeat=2
+        ):
+            left, right = left_class("x", left_value), right_class("x", right_value)
+            satisfiable = any(left.evaluate({"x": value}) and right.evaluate({"x": value}) for value in values)
+
+            assert left.contradicts(right) == right.contradicts(left) == (not satisfiable), (left, right)
+            assert not left.contradicts(right_class("y", right_value))
+
+class TestConditionFactory:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.factory = ConditionFactory()
+
+    def test_factory_create(self):
+        condition = self.factory.create(EqualsCondition, "browser", 8)
+
+        assert condition == EqualsCondition("browser", 8)
+        assert self.factory.create(EqualsCondition, "browser", 8) is condition
+        assert self.factory.create(NotEqualsCondition, "browser", 8) is not condition
+        assert len(self.factory) == 2
+
+    def test_factory_interns_strings(self):
+        variable, value = "".join(["device", "_type"]), "".join(["p", "c"])
+        condition = self.factory.create(EqualsCondition, variable, value)
+
+        assert condition.variable is self.factory.create(NotEqualsCondition, "device_type", "pc").variable
+        assert condition.value is self.factory.intern(GreaterThanCondition("device_type", "pc")).value
+
+    def test_factory_negate(self):
+        condition = self.factory.create(GreaterThanCondition, "score", 90)
+        negation = self.factory.negate(condition)
+
+        assert negation == LessThanOrEqualCondition("score", 90)
+        assert self.factory.negate(condition) is negation
+        assert self.factory.negate(negation) is condition
+        assert self.factory.negate(GreaterThanCondition("score", 90)) is negation
+        assert self.factory.create(LessThanOrEqualCondition, "score", 90) is negation
+
+    def test_condition_hash(self):
+        import pickle
+
+        condition = EqualsCondition("browser", 8)
+
+        assert hash(condition) == hash(EqualsCondition("browser", 8))
+        assert pickle.loads(pickle.dumps(condition)) == condition
+        assert hash(pickle.loads(pickle.dumps(condition))) == hash(condition)
+
+class TestConditionTables:
+
+    def test_condition_opcodes(self):
+        for opcode, condition_class in enumerate(CONDITION_CLASSES):
+            condition = condition_class("test", 50)
+
+            assert condition.opcode == opcode
+            assert condition.operator == OPERATORS[opcode]
+            assert condition.negate().opcode == NEGATIONS[opcode]
+            assert condition.negate().negate() == condition
+            assert not hasattr(condition, "__dict__")
+
+    def test_condition_hash_collisions(self):
+        assert hash(EqualsCondition("a", "b")) != hash(EqualsCondition("b", "a"))
+        assert EqualsCondition("test", 50) != NotEqualsCondition("test", 50)
+        assert EqualsCondition("test", 50) != EqualsCondition("other", 50)
+
+    def test_condition_contradicts_other_variable(self):
+        for condition_class in CONDITION_CLASSES:
+            for other_class in CONDITION_CLASSES:
+                assert not condition_class("test", 50).contradicts(other_class("other", 20))
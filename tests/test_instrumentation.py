@@ -0,0 +1,144 @@
+from instrumentation import Stats
+from strategy_tree import StrategyTree
+
+class TestStats:
+
+    def test_stats_phases(self):
+        import time
+
+        stats = Stats()
+        with stats.phase("outer"):
+            with stats.phase("inner"):
+                time.sleep(0.02)
+
+        assert stats.phases["inner"] >= 0.02
+        assert stats.phases["outer"] < stats.phases["inner"]
+        assert stats.peak_memory > 0
+
+    def test_stats_timed_and_count(self):
+        calls = []
+        stats = Stats(callback=lambda phase, stats: calls.append((phase, stats.strategies_written)))
+
+        items = list(stats.count(stats.timed(range(3), "produce"), "strategies_written"))
+
+        assert items == [0, 1, 2]
+        assert stats.strategies_written == 3
+        assert "produce" in stats.phases
+        assert calls == [("produce", 3)]
+
+    def test_stats_merge_and_pickle(self):
+        import pickle
+
+        stats = Stats(paths_explored=2, callback=print)
+        stats.merge(Stats(paths_explored=3, paths_killed=1))
+        restored = pickle.loads(pickle.dumps(stats))
+
+        assert stats.counters()["paths_explored"] == 5
+        assert restored.counters() == stats.counters()
+        assert restored.callback is None
+        assert "paths_killed" in str(stats)
+        assert stats.as_dict()["paths_killed"] == 1
+
+    def test_strategy_tree_stats(self, resources_path, tmp_path):
+        from os import path
+
+        tree = StrategyTree.from_string(
+            "0:[phone=5] yes=1,no=2\n1:[phone=7] yes=3,no=4\n3:[a=1] yes=5,no=6\n2:leaf=1\n4:leaf=2\n5:leaf=3\n6:leaf=4"
+        )
+        tree.stats = Stats()
+        tree.get_strategies()
+
+        assert tree.stats.counters() == {
+            "nodes_parsed": 0,
+            "paths_explored": 3,
+            "paths_killed": 1,
+            "prune_calls": 2,
+            "strategies_deduplicated": 0,
+            "strategies_written": 0,
+        }
+
+        phases = []
+        stats = Stats(callback=lambda phase, stats: phases.append(phase))
+        tree = StrategyTree.from_file(path.join(resources_path, "tree_to_convert__288_29.txt"), stats=stats)
+        tree.write_strategies(str(tmp_path / "strategies.txt"), dedupe_window=None)
+
+        serial_stats = stats.counters()
+        assert stats.nodes_parsed == 21
+        assert stats.strategies_written == len(tree.get_strategies())
+        assert phases == ["parse", "traverse", "write"]
+
+        tree.stats = Stats()
+        tree.get_strategies(max_workers=2, frontier_depth=1)
+        assert tree.stats.paths_explored == serial_stats["paths_explored"]
+        assert tree.stats.prune_calls == serial_stats["prune_calls"]
+
+    def test_strategy_tree_stats_deduplicated(self):
+        tree = StrategyTree.from_string(
+            "0:[a=1||or||b=2] yes=1,no=2\n1:[b=2||or||a=1] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3"
+        )
+        tree.stats = Stats()
+        strategies = list(tree.iter_strategies(dedupe_window=None))
+
+        assert tree.stats.strategies_deduplicated == tree.stats.prune_calls - len(strategies) > 0
+
+    def test_compact_and_cached_stats(self, resources_path, tmp_path, monkeypatch):
+        import sys
+        from os import path
+        from strategy_tree import get_arg_parser, run_cached
+
+        tree_path = path.join(resources_path, "tree_to_convert__288_29.txt")
+        tree = StrategyTree.from_file(tree_path, stats=Stats())
+        tree.write_strategies(str(tmp_path / "expected.txt"), dedupe_window=None)
+        expected = tree.stats.counters()
+
+        for options in (
+            ["--compact"], ["--cache-dir", str(tmp_path / "cache")],
+            ["--compact", "--cache-dir", str(tmp_path / "compact_cache")]
+        ):
+            monkeypatch.setattr(sys, "argv", [
+                "dv_strategies", "-f", tree_path, "-o", str(tmp_path / "strategies.txt"), *options
+            ])
+            stats = Stats()
+            run_cached(get_arg_parser(), stats)
+
+            assert stats.counters() == expected
+            assert "parse" in stats.phases
+
+    def test_subtree_cache_stats(self, resources_path, tmp_path, monkeypatch):
+        import sys
+        from os import path
+        from strategy_tree import get_arg_parser, run_cached
+
+        tree_path = path.join(resources_path, "tree_to_convert__288_29.txt")
+        written = len(StrategyTree.from_file(tree_path).get_strategies())
+
+        # A cold and then a warm run, which finds every subtree and leaves the cache file as it was
+        cache_path = tmp_path / "subtrees.pkl"
+        saved = []
+        for _ in range(2):
+            monkeypatch.setattr(sys, "argv", [
+                "dv_strategies", "-f", tree_path, "-o", str(tmp_path / "strategies.txt"), "--subtree-cache", str(cache_path)
+            ])
+            stats = Stats()
+            run_cached(get_arg_parser(), stats)
+            saved.append(cache_path.stat().st_mtime_ns)
+
+            assert stats.strategies_written == written
+            assert "write" in stats.phases
+        assert saved[0] == saved[1]
+
+    def test_forest_stats(self, resources_path, tmp_path):
+        from os import path
+        from strategy_forest import StrategyForest
+
+        forest_path = path.join(resources_path, "simple_forest.txt")
+        counters = []
+        for max_workers in (1, 2):
+            forest = StrategyForest.from_file(forest_path, Stats())
+            forest.write_strategies(str(tmp_path / "strategies.txt"), max_workers=max_workers)
+            counters.append(forest.stats.counters())
+
+        written = sum(len(strategies) for strategies in StrategyForest.from_file(forest_path).get_strategies().values())
+        assert counters[0] == counters[1]
+        assert counters[0]["nodes_parsed"] > 0 and counters[0]["prune_calls"] > 0
+        assert counters[0]["strategies_written"] == written
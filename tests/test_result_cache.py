@@ -0,0 +1,66 @@
+import pytest
+from result_cache import ResultCache
+from compact_tree import CompactStrategyTree
+
+class TestResultCache:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path, tmp_path):
+        from os import path
+
+        self.tree_path = path.join(resources_path, "tree_to_convert__288_29.txt")
+        self.cache = ResultCache(str(tmp_path / "cache"))
+
+    def test_result_cache_key(self, tmp_path):
+        copy_path = tmp_path / "tree.txt"
+        with open(self.tree_path, 'rb') as file:
+            copy_path.write_bytes(file.read())
+
+        assert self.cache.key(self.tree_path) == self.cache.key(str(copy_path))
+        assert self.cache.key(self.tree_path, format="text") != self.cache.key(self.tree_path, format="binary")
+        assert self.cache.key(self.tree_path, a=1, b=2) == self.cache.key(self.tree_path, b=2, a=1)
+
+        other_path = tmp_path / "other.txt"
+        other_path.write_text("0:leaf=1")
+        assert self.cache.key(str(other_path)) != self.cache.key(self.tree_path)
+
+    def test_result_cache_load_tree(self):
+        parsed = []
+
+        def parse():
+            parsed.append(True)
+            return CompactStrategyTree.from_file(self.tree_path)
+
+        tree = self.cache.load_tree(self.tree_path, parse)
+        cached_tree = ResultCache(self.cache.directory).load_tree(self.tree_path, parse)
+
+        assert len(parsed) == 1
+        assert cached_tree == tree
+        assert cached_tree.get_strategies() == tree.get_strategies()
+
+    def test_result_cache_output(self, tmp_path):
+        output_path = tmp_path / "strategies.txt"
+        output_path.write_text("if (a=1) then 1.0\n")
+        key = self.cache.key(self.tree_path)
+
+        assert not self.cache.restore_output(key, str(tmp_path / "restored.txt"))
+        self.cache.store_output(key, str(output_path))
+        assert self.cache.restore_output(key, str(tmp_path / "restored.txt"))
+        assert (tmp_path / "restored.txt").read_text() == "if (a=1) then 1.0\n"
+
+    def test_result_cache_eviction(self, tmp_path):
+        import os
+
+        output_path = tmp_path / "strategies.txt"
+        output_path.write_bytes(b"x" * 100)
+        cache = ResultCache(str(tmp_path / "small_cache"), max_size=250)
+
+        for index, key in enumerate(("first", "second")):
+            cache.store_output(key, str(output_path))
+            os.utime(os.path.join(cache.directory, f"{key}.out"), (index, index))
+
+        # A hit makes "first" the most recently used entry, "second" goes when a third one is stored
+        assert cache.restore_output("first", str(tmp_path / "restored.txt"))
+        cache.store_output("third", str(output_path))
+
+        assert sorted(os.listdir(cache.directory)) == ["first.out", "third.out"]
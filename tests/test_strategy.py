@@ -4,7 +4,7 @@ from conditions import (
     GreaterThanCondition, GreaterThanOrEqualCondition,
     LessThanCondition, LessThanOrEqualCondition
 )
-from strategy import Strategy
+from strategy import Strategy, VariableDomain, deduplicate, extend_state, minimize
 
 class TestStrategy:
 
@@ -145,6 +145,201 @@ class TestStrategy:
             value=0.75
         )
     
+    def test_strategy_prune_symmetric(self):
+        for conditions in (
+            [GreaterThanOrEqualCondition("rating", 4), LessThanCondition("rating", 4)],
+            [LessThanCondition("rating", 4), GreaterThanOrEqualCondition("rating", 4)],
+        ):
+            assert Strategy(conditions=conditions, value=1.0).prune() is None
+
+        assert Strategy(
+            conditions=[GreaterThanOrEqualCondition("rating", 4), GreaterThanCondition("rating", 4)],
+            value=1.0
+        ).prune() == Strategy(conditions=[GreaterThanCondition("rating", 4)], value=1.0)
+
+    def test_strategy_prune_integral_variables(self):
+        strategy = Strategy(
+            conditions=frozenset([GreaterThanCondition("age", 17), LessThanCondition("age", 19), NotEqualsCondition("age", 30)]),
+            value=0.5
+        )
+
+        assert strategy.prune().conditions == frozenset([GreaterThanCondition("age", 17), LessThanCondition("age", 19)])
+        assert strategy.prune(integral_variables={"age"}).conditions == frozenset([EqualsCondition("age", 18)])
+
     def test_strategy_str(self):
         assert str(self.strategy) == "if (age=18 && status!=inactive && score>90 && points>=100 && time<60 && distance<=5) then 0.5"
 
+class TestVariableDomain:
+
+    def test_domain_equal(self):
+        domain = VariableDomain().add(NotEqualsCondition("age", 17)).add(GreaterThanCondition("age", 10))
+
+        assert domain.add(EqualsCondition("age", 18)) == VariableDomain(equal=EqualsCondition("age", 18))
+        assert domain.add(EqualsCondition("age", 17)) is None
+        assert domain.add(EqualsCondition("age", 10)) is None
+
+        pinned = domain.add(EqualsCondition("age", 18))
+        assert pinned.add(NotEqualsCondition("age", 17)) is pinned
+        assert pinned.add(LessThanOrEqualCondition("age", 18)) is pinned
+        assert pinned.add(LessThanCondition("age", 18)) is None
+
+    def test_domain_bounds(self):
+        domain = VariableDomain().add(GreaterThanOrEqualCondition("x", 5))
+
+        assert domain.add(GreaterThanCondition("x", 5)).lower == GreaterThanCondition("x", 5)
+        assert domain.add(GreaterThanOrEqualCondition("x", 4)) is domain
+        assert domain.add(LessThanCondition("x", 5)) is None
+        assert domain.add(LessThanOrEqualCondition("x", 5)).conditions() == [EqualsCondition("x", 5)]
+        assert domain.add(NotEqualsCondition("x", 5)).add(LessThanOrEqualCondition("x", 5)) is None
+
+    def test_domain_drops_excluded_values_outside_bounds(self):
+        domain = VariableDomain().add(GreaterThanCondition("x", 5))
+
+        assert domain.add(NotEqualsCondition("x", 3)) is domain
+        assert domain.add(NotEqualsCondition("x", 5)) is domain
+        assert domain.add(NotEqualsCondition("x", 7)).conditions() == [
+            NotEqualsCondition("x", 7), GreaterThanCondition("x", 5)
+        ]
+
+        excluded = VariableDomain().add(NotEqualsCondition("x", 3)).add(NotEqualsCondition("x", 8))
+        assert set(excluded.add(LessThanCondition("x", 5)).conditions()) == {
+            NotEqualsCondition("x", 3), LessThanCondition("x", 5)
+        }
+        assert VariableDomain().add(NotEqualsCondition("x", "a")).add(LessThanCondition("x", 5)).excluded
+
+    def test_integral_domain(self):
+        domain = VariableDomain(integral=True).add(GreaterThanCondition("x", 5))
+
+        assert domain.add(LessThanCondition("x", 6)) is None
+        assert domain.add(LessThanCondition("x", 7)).conditions() == [EqualsCondition("x", 6)]
+        assert domain.add(NotEqualsCondition("x", 6)).add(LessThanOrEqualCondition("x", 7)).conditions() == [
+            EqualsCondition("x", 7)
+        ]
+        assert domain.add(NotEqualsCondition("x", 6)).add(LessThanCondition("x", 7)) is None
+        assert VariableDomain().add(GreaterThanCondition("x", 5)).add(LessThanCondition("x", 6)) is not None
+        assert domain.add(LessThanCondition("x", 6.5)) is not None
+
+    def test_extend_state(self):
+        state = extend_state({}, [EqualsCondition("phone", 5), NotEqualsCondition("browser", 7)])
+
+        assert set(state) == {"phone", "browser"}
+        assert extend_state(state, [EqualsCondition("phone", 5)]) is state
+        assert extend_state(state, [EqualsCondition("phone", 7)]) is None
+
+        extended = extend_state(state, [NotEqualsCondition("browser", 8)])
+        assert extended is not state
+        assert extended["phone"] is state["phone"]
+        assert state["browser"].conditions() == [NotEqualsCondition("browser", 7)]
+
+    def test_strategy_from_state(self):
+        state = extend_state({}, [NotEqualsCondition("browser", 7), EqualsCondition("browser", 8)])
+
+        assert Strategy.from_state(state, 0.5) == Strategy(
+            conditions=frozenset([EqualsCondition("browser", 8)]),
+            value=0.5
+        )
+
+class TestDeduplicate:
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.first = Strategy(conditions=frozenset([EqualsCondition("age", 18)]), value=0.5)
+        self.second = Strategy(conditions=frozenset([NotEqualsCondition("age", 18)]), value=0.5)
+        self.third = Strategy(conditions=frozenset([EqualsCondition("age", 18)]), value=1.0)
+
+    def test_deduplicate(self):
+        strategies = [self.first, self.second, self.first, self.third, self.second, self.first]
+        assert list(deduplicate(strategies)) == [self.first, self.second, self.third]
+
+    def test_deduplicate_window(self):
+        strategies = [self.first, self.second, self.first, self.third, self.second, self.first]
+        assert list(deduplicate(strategies, window=2)) == [self.first, self.second, self.third, self.second, self.first]
+        assert list(deduplicate(strategies, window=1)) == [
+            self.first, self.second, self.first, self.third, self.second, self.first
+        ]
+
+    def test_deduplicate_is_lazy(self):
+        def strategies():
+            yield self.first
+            raise AssertionError("consumed too far")
+
+        assert next(deduplicate(strategies())) == self.first
+
+class TestMinimize:
+
+    def test_minimize_complement(self):
+        assert minimize([
+            Strategy(conditions=frozenset([EqualsCondition("browser", 7), EqualsCondition("os", 5)]), value=1.0),
+            Strategy(conditions=frozenset([NotEqualsCondition("browser", 7), EqualsCondition("os", 5)]), value=1.0),
+            Strategy(conditions=frozenset([LessThanCondition("size", 5)]), value=2.0),
+            Strategy(conditions=frozenset([GreaterThanOrEqualCondition("size", 5)]), value=2.0),
+        ]) == {
+            Strategy(conditions=frozenset([EqualsCondition("os", 5)]), value=1.0),
+            Strategy(conditions=frozenset(), value=2.0),
+        }
+
+    def test_minimize_absorbs_excluded_value(self):
+        assert minimize([
+            Strategy(
+                conditions=frozenset([NotEqualsCondition("browser", 7), NotEqualsCondition("browser", 8)]),
+                value=1.0
+            ),
+            Strategy(conditions=frozenset([EqualsCondition("browser", 8)]), value=1.0),
+        ]) == {
+            Strategy(conditions=frozenset([NotEqualsCondition("browser", 7)]), value=1.0),
+        }
+
+        # browser=3 is outside browser>5, merging would widen the first strategy
+        strategies = {
+            Strategy(
+                conditions=frozenset([NotEqualsCondition("browser", 3), GreaterThanCondition("browser", 5)]),
+                value=1.0
+            ),
+            Strategy(conditions=frozenset([EqualsCondition("browser", 3)]), value=1.0),
+        }
+        assert minimize(strategies) == strategies
+
+    def test_minimize_keeps_values_apart(self):
+        strategies = {
+            Strategy(conditions=frozenset([EqualsCondition("browser", 7)]), value=1.0),
+            Strategy(conditions=frozenset([NotEqualsCondition("browser", 7)]), value=2.0),
+            Strategy(conditions=frozenset([EqualsCondition("browser", 8)]), value=2.0),
+        }
+        assert minimize(strategies) == strategies
+
+    def test_minimize_is_equivalent(self):
+        import itertools
+        from strategy_tree import StrategyTree
+
+        strategies = StrategyTree.from_string(
+            "0:[browser=7||or||browser=8] yes=1,no=2\n1:[os=5] yes=3,no=4\n2:[os=5] yes=5,no=6\n"
+            "3:leaf=1\n4:leaf=2\n5:leaf=1\n6:[device=pc] yes=7,no=8\n7:leaf=3\n8:leaf=3"
+        ).get_strategies()
+        minimized = minimize(strategies)
+        domains = {
+            "browser": [5, 7, 8, None],
+            "os": [5, 6, None],
+            "device": ["pc", "mobile", None],
+        }
+
+        def values(strategies, features):
+            return {
+                strategy.value for strategy in strategies
+                if all(condition.evaluate(features) for condition in strategy.conditions)
+            }
+
+        assert len(strategies) == 7
+        assert minimized == {
+            Strategy(conditions=frozenset([EqualsCondition("os", 5)]), value=1.0),
+            Strategy(conditions=frozenset([EqualsCondition("browser", 7), NotEqualsCondition("os", 5)]), value=2.0),
+            Strategy(conditions=frozenset([EqualsCondition("browser", 8), NotEqualsCondition("os", 5)]), value=2.0),
+            Strategy(
+                conditions=frozenset([
+                    NotEqualsCondition("browser", 7), NotEqualsCondition("browser", 8), NotEqualsCondition("os", 5)
+                ]),
+                value=3.0
+            ),
+        }
+        for combination in itertools.product(*domains.values()):
+            features = {variable: value for variable, value in zip(domains, combination) if value is not None}
+            assert values(minimized, features) == values(strategies, features)
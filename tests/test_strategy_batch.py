@@ -0,0 +1,89 @@
+import json
+import sys
+
+import pytest
+from strategy_batch import output_paths, resolve_inputs, run_batch
+from strategy_tree import StrategyTree, get_arg_parser
+from tree_generator import generate
+
+class TestStrategyBatch:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.input_path = tmp_path / "trees"
+        self.input_path.mkdir()
+        for seed in range(3):
+            (self.input_path / f"tree_{seed}.txt").write_text(generate(6, or_fanout=2, seed=seed))
+        (self.input_path / ".hidden").write_text("")
+
+    def parse_args(self, monkeypatch, *arguments):
+        monkeypatch.setattr(sys, "argv", ["dv_strategies", *arguments])
+        return get_arg_parser()
+
+    def test_resolve_inputs(self, tmp_path):
+        expected = [str(self.input_path / f"tree_{seed}.txt") for seed in range(3)]
+        manifest_path = tmp_path / "manifest.txt"
+        manifest_path.write_text("trees/tree_2.txt\n\n# skipped\ntrees/tree_0.txt\n")
+
+        assert resolve_inputs(str(self.input_path)) == expected
+        assert resolve_inputs(str(self.input_path / "tree_*.txt")) == expected
+        assert resolve_inputs(manifest_path=str(manifest_path)) == [expected[2], expected[0]]
+
+    def test_output_paths(self, tmp_path):
+        assert output_paths(["a/tree.txt", "b/other.txt"], "out", "jsonl") == [
+            ("a/tree.txt", "out/tree.jsonl"), ("b/other.txt", "out/other.jsonl")
+        ]
+        with pytest.raises(ValueError):
+            output_paths(["a/tree.txt", "b/tree.txt"], "out", "text")
+
+    def test_batch_arguments(self, monkeypatch, tmp_path):
+        args = self.parse_args(monkeypatch, "-f", str(self.input_path))
+        assert args.batch and args.strategies_file_path == "strategies"
+
+        args = self.parse_args(monkeypatch, "-f", str(self.input_path / "tree_0.txt"))
+        assert not args.batch and args.strategies_file_path == "strategies.txt"
+
+        with pytest.raises(SystemExit):
+            self.parse_args(monkeypatch, "-f", str(self.input_path), "--subtree-cache", str(tmp_path / "cache"))
+        with pytest.raises(SystemExit):
+            self.parse_args(monkeypatch)
+
+    def test_glob_like_file_name(self, monkeypatch, tmp_path):
+        tree_path = tmp_path / "model[1].txt"
+        tree_path.write_text("0:leaf=1")
+
+        assert not self.parse_args(monkeypatch, "-f", str(tree_path)).batch
+        assert self.parse_args(monkeypatch, "-f", str(tmp_path / "model[0-9].txt")).batch
+
+    def test_run_batch_without_inputs(self, monkeypatch, tmp_path):
+        manifest_path = tmp_path / "manifest.txt"
+        manifest_path.write_text("# nothing yet\n")
+
+        for arguments in (["-f", str(tmp_path / "missing_*.txt")], ["--manifest", str(manifest_path)]):
+            with pytest.raises(ValueError):
+                run_batch(self.parse_args(monkeypatch, *arguments, "-o", str(tmp_path / "out")))
+
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_run_batch(self, monkeypatch, tmp_path, workers):
+        (self.input_path / "broken.txt").write_text("0:[browser] yes=2,no=1\n2:leaf=1\n1:leaf=2")
+        output_path, report_path = tmp_path / "out", tmp_path / "report.json"
+        args = self.parse_args(
+            monkeypatch, "-f", str(self.input_path), "-o", str(output_path), "--report", str(report_path),
+            "--stats", "--sort", "-j", workers
+        )
+
+        report = run_batch(args)
+
+        assert [result.input_path for result in report.failures] == [str(self.input_path / "broken.txt")]
+        assert "ValueError" in report.failures[0].error
+        for seed in range(3):
+            expected_path = tmp_path / f"expected_{seed}.txt"
+            StrategyTree.from_file(str(self.input_path / f"tree_{seed}.txt")).write_strategies(
+                str(expected_path), sort_chunk_size=1000
+            )
+            assert (output_path / f"tree_{seed}.txt").read_bytes() == expected_path.read_bytes()
+
+        report_json = json.loads(report_path.read_text())
+        assert (report_json["files"], report_json["failed"]) == (4, 1)
+        assert all(result["seconds"] > 0 and "stats" in result for result in report_json["results"])
+        assert "4 files, 1 failed" in str(report)
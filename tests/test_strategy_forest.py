@@ -0,0 +1,87 @@
+import pytest
+from strategy_forest import StrategyForest
+from strategy_tree import StrategyTree
+from strategy import Strategy
+from conditions import EqualsCondition, NotEqualsCondition
+
+class TestStrategyForest:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path):
+        from os import path
+
+        self.forest_path = path.join(resources_path, "simple_forest.txt")
+        self.forest = StrategyForest.from_file(self.forest_path)
+        self.tree = StrategyTree.from_file(path.join(resources_path, "simple_tree.txt"))
+
+    def test_strategy_forest_from_file(self):
+        assert list(self.forest.trees.keys()) == [0, 1]
+        assert self.forest.trees[0] == self.tree
+        assert self.forest.trees[1] == StrategyTree.from_string("0:[os_family=5] yes=2,no=1\n1:leaf=1\n2:leaf=2")
+
+    def test_strategy_forest_without_header(self, resources_path):
+        from os import path
+
+        forest = StrategyForest.from_file(path.join(resources_path, "simple_tree.txt"))
+        assert forest.trees == {0: self.tree}
+
+    def test_strategy_forest_get_strategies(self):
+        expected = {
+            0: self.tree.get_strategies(),
+            1: {
+                Strategy(conditions=frozenset([EqualsCondition("os_family", 5)]), value=2.0),
+                Strategy(conditions=frozenset([NotEqualsCondition("os_family", 5)]), value=1.0),
+            },
+        }
+
+        assert self.forest.get_strategies(max_workers=1) == expected
+        assert self.forest.get_strategies(max_workers=2) == expected
+
+    def test_strategy_forest_write_strategies(self, tmp_path):
+        output_path = tmp_path / "strategies.txt"
+        self.forest.write_strategies(str(output_path), max_workers=1)
+
+        lines = output_path.read_text().splitlines()
+        assert len(lines) == 6
+        assert sum(line.startswith("booster[0]:if (") for line in lines) == 4
+        assert "booster[1]:if (os_family=5) then 2.0" in lines
+
+    def test_strategy_forest_write_split_strategies(self, tmp_path):
+        self.forest.write_strategies(str(tmp_path / "strategies.txt"), split=True, max_workers=2)
+
+        assert len((tmp_path / "strategies_0.txt").read_text().splitlines()) == 4
+        assert sorted((tmp_path / "strategies_1.txt").read_text().splitlines()) == [
+            "if (os_family!=5) then 1.0",
+            "if (os_family=5) then 2.0",
+        ]
+
+    def test_strategy_forest_write_formats(self, tmp_path):
+        import json
+        from strategy_io import read_binary
+
+        output_path = tmp_path / "strategies.jsonl"
+        self.forest.write_strategies(str(output_path), max_workers=1, output_format="jsonl")
+
+        records = [json.loads(line) for line in output_path.read_text().splitlines()]
+        assert [record["booster"] for record in records].count(1) == 2
+
+        self.forest.write_strategies(str(tmp_path / "strategies.bin"), split=True, max_workers=1, output_format="binary")
+        assert set(read_binary(str(tmp_path / "strategies_1.bin"))) == self.forest.trees[1].get_strategies()
+
+        self.forest.write_strategies(str(tmp_path / "other.txt"), split=True, max_workers=1, output_format="binary")
+        assert set(read_binary(str(tmp_path / "other_1.bin"))) == self.forest.trees[1].get_strategies()
+        assert not (tmp_path / "other_1.txt").exists()
+
+        with pytest.raises(ValueError):
+            self.forest.write_strategies(str(tmp_path / "strategies.bin"), max_workers=1, output_format="binary")
+
+    def test_strategy_forest_rejects_tree_options(self, tmp_path, monkeypatch):
+        import sys
+        from strategy_tree import get_arg_parser, run
+
+        for option in (["--mmap"], ["--dedupe-window", "10"], ["--minimize"], ["--disjoint-or"], ["--memoize"]):
+            monkeypatch.setattr(sys, "argv", [
+                "dv_strategies", "-f", self.forest_path, "-o", str(tmp_path / "strategies.txt"), "--forest", *option
+            ])
+            with pytest.raises(ValueError, match=option[0]):
+                run(get_arg_parser())
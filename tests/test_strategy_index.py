@@ -0,0 +1,87 @@
+import pytest
+from strategy_index import StrategyIndex
+from strategy_tree import StrategyTree
+from strategy import Strategy
+from conditions import EqualsCondition, NotEqualsCondition, GreaterThanCondition
+
+class TestStrategyIndex:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path):
+        from os import path
+
+        self.tree = StrategyTree.from_file(path.join(resources_path, "tree_to_convert__288_29.txt"))
+        self.strategies = list(self.tree.get_strategies())
+        self.index = StrategyIndex.from_strategies(self.strategies)
+
+    def test_strategy_index_constructor(self):
+        assert len(self.index) == len(self.strategies)
+        assert list(self.index._ids(self.index.postings[("browser", 8)])) == [
+            strategy_id for strategy_id, strategy in enumerate(self.strategies)
+            if EqualsCondition("browser", 8) in strategy.conditions
+        ]
+        assert list(self.index._ids(self.index.exclusions[("browser", 8)])) == [
+            strategy_id for strategy_id, strategy in enumerate(self.strategies)
+            if NotEqualsCondition("browser", 8) in strategy.conditions
+        ]
+
+    def test_strategy_index_match(self):
+        import itertools
+
+        domains = {
+            "device_type": ["pc", "mobile", None],
+            "browser": [5, 7, 8, None],
+            "os_family": [5, 6],
+            "language": [2, None],
+            "size": ["300x600", None],
+            "position": [2, None],
+            "region": ["FR:A5", None],
+        }
+
+        for values in itertools.product(*domains.values()):
+            features = {variable: value for variable, value in zip(domains, values) if value is not None}
+            linear_matches = {
+                strategy_id for strategy_id, strategy in enumerate(self.strategies)
+                if all(condition.evaluate(features) for condition in strategy.conditions)
+            }
+
+            assert set(self.index.match_ids(features)) == linear_matches
+            assert {strategy.value for strategy in self.index.match(features)} == {self.tree.predict(features)}
+
+    def test_strategy_index_residuals(self):
+        index = StrategyIndex.from_strategies([
+            Strategy(conditions=frozenset([EqualsCondition("a", 1), GreaterThanCondition("b", 5)]), value=1.0),
+        ])
+        index.add(Strategy(conditions=frozenset([NotEqualsCondition("a", 1)]), value=2.0))
+
+        assert index.residuals == [(GreaterThanCondition("b", 5),), ()]
+        assert index.pinned == {"a": 0b01}
+        assert index.exclusions == {("a", 1): 0b10}
+        assert index.match_ids({"a": 1, "b": 6}) == [0]
+        assert index.match_ids({"a": 1, "b": 5}) == []
+        assert index.match_ids({"a": 2, "b": 6}) == [1]
+        assert index.match_ids({}) == [1]
+
+    def test_strategy_index_conjunctions(self):
+        index = StrategyIndex.from_strategies([
+            Strategy(conditions=frozenset([EqualsCondition("a", 1), EqualsCondition("b", 2)]), value=1.0),
+            Strategy(conditions=frozenset([EqualsCondition("a", 1), NotEqualsCondition("c", 3)]), value=2.0),
+            Strategy(conditions=frozenset([EqualsCondition("b", 2)]), value=3.0),
+        ])
+
+        assert index.match_ids({"a": 1, "b": 2}) == [0, 1, 2]
+        assert index.match_ids({"a": 1, "b": 2, "c": 3}) == [0, 2]
+        assert index.match_ids({"a": 1}) == [1]
+        assert index.match_ids({"b": 2, "c": 3}) == [2]
+        assert index.match_ids({"a": 2, "b": 2}) == [2]
+
+        index.add(Strategy(conditions=frozenset([EqualsCondition("b", 3)]), value=4.0))
+        assert index.match_ids({"a": 1, "b": 2}) == [0, 1, 2]
+        assert index.match_ids({"b": 3}) == [3]
+
+    def test_strategy_index_ids(self):
+        strategy_ids = [0, 5, 1023, 1024, 4000, 65535, 100000]
+
+        assert list(StrategyIndex._ids(sum(1 << strategy_id for strategy_id in strategy_ids))) == strategy_ids
+        assert list(StrategyIndex._ids((1 << 5000) - 1)) == list(range(5000))
+        assert list(StrategyIndex._ids(0)) == []
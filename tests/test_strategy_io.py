@@ -0,0 +1,63 @@
+import pytest
+import strategy_io
+from strategy_io import StrategyArrays, read_binary, read_binary_arrays, read_jsonl
+from strategy_tree import StrategyTree
+from strategy import Strategy
+from conditions import EqualsCondition, NotEqualsCondition, GreaterThanCondition
+
+class TestStrategyIO:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path):
+        from os import path
+
+        self.tree = StrategyTree.from_file(path.join(resources_path, "tree_to_convert__288_29.txt"))
+        self.strategies = self.tree.get_strategies()
+
+    def test_strategy_io_binary_round_trip(self, tmp_path):
+        output_path = tmp_path / "strategies.bin"
+        self.tree.write_strategies(str(output_path), output_format="binary")
+
+        assert set(read_binary(str(output_path))) == self.strategies
+
+    def test_strategy_io_binary_arrays(self, tmp_path):
+        output_path = tmp_path / "strategies.bin"
+        strategies = [
+            Strategy(conditions=frozenset([EqualsCondition("size", "8"), NotEqualsCondition("browser", 8)]), value=0.5),
+            Strategy(conditions=frozenset([GreaterThanCondition("browser", 8)]), value=1.5),
+            Strategy(conditions=frozenset(), value=2.0),
+        ]
+        strategy_io.write(strategies, str(output_path), "binary")
+
+        arrays = read_binary_arrays(str(output_path))
+        assert len(arrays) == 3
+        assert list(arrays.values) == [0.5, 1.5, 2.0]
+        assert list(arrays.condition_offsets) == [0, 2, 3, 3]
+        # Ints and strings with the same text get their own entries
+        assert sorted(map(repr, arrays.strings)) == sorted(["'size'", "'8'", "'browser'", "8"])
+        assert arrays.conditions(1) == [GreaterThanCondition("browser", 8)]
+        assert list(arrays.iter_strategies()) == strategies
+
+    def test_strategy_io_binary_invalid_file(self, tmp_path):
+        output_path = tmp_path / "strategies.txt"
+        self.tree.write_strategies(str(output_path))
+
+        with pytest.raises(ValueError):
+            read_binary(str(output_path))
+        with pytest.raises(ValueError):
+            StrategyArrays.from_bytes(b"DVST\x02\x00" + bytes(24) + b"DVST")
+
+    def test_strategy_io_jsonl_round_trip(self, tmp_path):
+        import json
+
+        output_path = tmp_path / "strategies.jsonl"
+        self.tree.write_strategies(str(output_path), output_format="jsonl")
+
+        records = [json.loads(line) for line in output_path.read_text().splitlines()]
+        assert len(records) == len(self.strategies)
+        assert set(records[0]) == {"conditions", "value"}
+        assert set(read_jsonl(str(output_path))) == self.strategies
+
+    def test_strategy_io_unsupported_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            strategy_io.write(self.strategies, str(tmp_path / "strategies.csv"), "csv")
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+import strategy_io
+from strategy_sort import sort_strategies, sorted_conditions, strategy_key
+from strategy_tree import StrategyTree
+from strategy import Strategy
+from conditions import EqualsCondition, NotEqualsCondition, GreaterThanCondition, LessThanCondition
+from tree_generator import generate_tree
+
+class TestStrategySort:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path):
+        from os import path
+
+        self.tree = StrategyTree.from_file(path.join(resources_path, "tree_to_convert__288_29.txt"))
+        self.strategies = list(self.tree.get_strategies())
+
+    def test_sorted_conditions(self):
+        strategy = Strategy(
+            conditions=frozenset([
+                NotEqualsCondition("size", "a"), EqualsCondition("browser", 8), NotEqualsCondition("size", 3),
+                LessThanCondition("age", 30), GreaterThanCondition("age", 18)
+            ]),
+            value=0.5
+        )
+
+        assert sorted_conditions(strategy) == [
+            GreaterThanCondition("age", 18), LessThanCondition("age", 30), EqualsCondition("browser", 8),
+            NotEqualsCondition("size", 3), NotEqualsCondition("size", "a")
+        ]
+
+    def test_sort_strategies_in_memory(self):
+        shuffled = random.Random(0).sample(self.strategies, len(self.strategies))
+        ordered = list(sort_strategies(shuffled))
+
+        assert ordered == sorted(self.strategies, key=strategy_key)
+        assert ordered == list(sort_strategies(reversed(shuffled)))
+
+    def test_sort_strategies_spills_runs(self, monkeypatch):
+        import strategy_sort
+
+        monkeypatch.setattr(strategy_sort, "SPILL_BATCH_SIZE", 3)
+        strategies = list(generate_tree(8, or_fanout=2, operators={"=": 1, "!=": 1, ">": 1}, seed=2).get_strategies())
+
+        assert len(strategies) > 50
+        assert list(sort_strategies(strategies, chunk_size=7)) == list(sort_strategies(strategies, chunk_size=len(strategies)))
+
+    @pytest.mark.parametrize("output_format", ["text", "jsonl", "binary"])
+    def test_sorted_output_is_deterministic(self, tmp_path, output_format):
+        first_path, second_path = tmp_path / "first", tmp_path / "second"
+        strategy_io.write(self.strategies, str(first_path), output_format, sort_chunk_size=4)
+        strategy_io.write(reversed(self.strategies), str(second_path), output_format, sort_chunk_size=1000)
+
+        assert first_path.read_bytes() == second_path.read_bytes()
+
+    def test_write_strategies_sorted(self, tmp_path):
+        output_path = tmp_path / "strategies.txt"
+        self.tree.write_strategies(str(output_path), sort_chunk_size=5)
+
+        expected = sorted(self.tree.get_strategies(), key=strategy_key)
+        assert output_path.read_text().splitlines() == [
+            strategy.format(sorted_conditions(strategy)) for strategy in expected
+        ]
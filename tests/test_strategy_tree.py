@@ -155,6 +155,415 @@ class TestStrategyTree:
         
         assert StrategyTree.from_file(path.join(resources_path, "tree_to_convert__288_29.txt")) == self.strategy_tree
     
+    def test_strategy_tree_from_lines(self, resources_path):
+        from os import path
+
+        with open(path.join(resources_path, "tree_to_convert__288_29.txt")) as file:
+            content = file.read()
+
+        assert StrategyTree.from_lines(line for line in content.splitlines()) == StrategyTree.from_string(content)
+
+    def test_strategy_tree_from_mmap(self, resources_path):
+        from os import path
+
+        file_path = path.join(resources_path, "tree_to_convert__288_29.txt")
+
+        assert StrategyTree.from_file(file_path, use_mmap=True) == self.strategy_tree
+        with open(file_path) as file:
+            assert list(StrategyTree.iter_nodes_mmap(file_path)) == list(StrategyTree.iter_nodes(file))
+
+    def test_strategy_tree_iter_nodes(self):
+        nodes = list(StrategyTree.iter_nodes(["0:[browser=8||or||browser=5] yes=2,no=1", "", "  2:leaf=0.5", "1:leaf=1"]))
+
+        assert nodes == [
+            ConditionNode(0, [EqualsCondition("browser", 8), EqualsCondition("browser", 5)], 2, 1),
+            LeafNode(2, 0.5),
+            LeafNode(1, 1.0),
+        ]
+
+    def test_strategy_tree_typed_values(self):
+        nodes = list(StrategyTree.iter_nodes([
+            "0:[x>=5||or||y<-1.5||or||z<=2e3||or||size=300x600||or||w!=-3] yes=2,no=1", "2:leaf=-1.5e-05", "1:leaf=.5"
+        ]))
+
+        assert nodes == [
+            ConditionNode(0, [
+                GreaterThanOrEqualCondition("x", 5),
+                LessThanCondition("y", -1.5),
+                LessThanOrEqualCondition("z", 2000.0),
+                EqualsCondition("size", "300x600"),
+                NotEqualsCondition("w", -3)
+            ], 2, 1),
+            LeafNode(2, -1.5e-05),
+            LeafNode(1, 0.5),
+        ]
+        assert type(nodes[0].conditions[0].value) is int
+
+    def test_strategy_tree_integral_variables(self):
+        from compact_tree import CompactStrategyTree
+        from subtree_cache import SubtreeCache
+
+        content = "0:[x>5] yes=1,no=2\n1:[x<6] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:[x!=7] yes=5,no=6\n5:leaf=3\n6:leaf=4"
+        tree = StrategyTree.from_string(content)
+        integral_tree = StrategyTree.from_string(content)
+        integral_tree.integral_variables = frozenset({"x"})
+
+        assert Strategy(frozenset([GreaterThanCondition("x", 5), LessThanCondition("x", 6)]), 2.0) in tree.get_strategies()
+        assert integral_tree.get_strategies() == {
+            Strategy(frozenset([LessThanOrEqualCondition("x", 5)]), 1.0),
+            Strategy(frozenset([GreaterThanOrEqualCondition("x", 6), NotEqualsCondition("x", 7)]), 3.0),
+            Strategy(frozenset([EqualsCondition("x", 7)]), 4.0),
+        }
+        assert integral_tree.get_strategies(memoize=True) == integral_tree.get_strategies()
+        assert integral_tree.get_strategies(max_workers=2, frontier_depth=1) == integral_tree.get_strategies()
+
+        compact_tree = CompactStrategyTree.from_tree(integral_tree)
+        assert compact_tree.get_strategies() == integral_tree.get_strategies()
+        assert compact_tree.to_tree().get_strategies() == integral_tree.get_strategies()
+
+        subtree_cache = SubtreeCache()
+        assert subtree_cache.extract(integral_tree)[0] == integral_tree.get_strategies()
+        assert subtree_cache.strategies() == integral_tree.get_strategies()
+
+    def test_strategy_tree_shares_conditions(self, resources_path):
+        from os import path
+
+        for use_mmap in (False, True):
+            tree = StrategyTree.from_file(path.join(resources_path, "tree_to_convert__288_29.txt"), use_mmap=use_mmap)
+
+            assert tree.root.false_branch.conditions[0] is tree.root.true_branch.true_branch.conditions[0]
+            assert tree.condition_factory.create(EqualsCondition, "browser", 8) is tree.root.false_branch.conditions[0]
+            assert tree.get_strategies() == self.strategy_tree.get_strategies()
+
+    def test_strategy_tree_iter_strategies(self):
+        tree = StrategyTree.from_string(
+            "0:[a=1||or||b=2] yes=1,no=2\n1:[b=2||or||a=1] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3"
+        )
+        strategies = list(tree.iter_strategies())
+
+        assert len(strategies) > len(set(strategies))
+        assert set(strategies) == tree.get_strategies()
+        assert sorted(map(str, tree.iter_strategies(dedupe_window=None))) == sorted(map(str, tree.get_strategies()))
+
+    def test_strategy_tree_write_strategies(self, tmp_path):
+        tree = StrategyTree.from_string(
+            "0:[a=1||or||b=2] yes=1,no=2\n1:[b=2||or||a=1] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3"
+        )
+        output_path = tmp_path / "strategies.txt"
+
+        tree.write_strategies(str(output_path))
+        assert len(output_path.read_text().splitlines()) == len(tree.get_strategies())
+
+        tree.write_strategies(str(output_path), dedupe_window=0)
+        assert len(output_path.read_text().splitlines()) == len(list(tree.iter_strategies()))
+
+    @pytest.mark.parametrize("use_mmap", [False, True])
+    def test_strategy_tree_write_strategies_pipelined(self, tmp_path, monkeypatch, use_mmap):
+        import strategy_tree
+        from instrumentation import Stats
+        from tree_generator import generate_lines
+
+        # Tiny batches and queue so that the traversal waits on the reader and the writer
+        monkeypatch.setattr(strategy_tree, "PIPELINE_BATCH_SIZE", 2)
+        lines = list(generate_lines(8, or_fanout=2, operators={"=": 1, "!=": 1, "<": 1}, seed=5))
+        input_path, output_path, expected_path = tmp_path / "tree.txt", tmp_path / "pipelined.txt", tmp_path / "expected.txt"
+        # Children before their parents, the traversal has to wait for the root
+        input_path.write_text("\n".join(reversed(lines)))
+
+        tree = StrategyTree.from_file(str(input_path), stats=Stats())
+        tree.write_strategies(str(expected_path), sort_chunk_size=100)
+        stats = Stats()
+        StrategyTree.write_strategies_pipelined(
+            str(input_path), str(output_path), sort_chunk_size=100, use_mmap=use_mmap, stats=stats, queue_size=1
+        )
+
+        assert output_path.read_bytes() == expected_path.read_bytes()
+        assert stats.counters() == tree.stats.counters()
+        assert "pipeline" in stats.phases
+
+    def test_strategy_tree_write_strategies_pipelined_errors(self, tmp_path):
+        input_path, output_path = tmp_path / "tree.txt", tmp_path / "strategies.txt"
+
+        input_path.write_text("0:[browser] yes=2,no=1\n2:leaf=1\n1:leaf=2")
+        with pytest.raises(ValueError):
+            StrategyTree.write_strategies_pipelined(str(input_path), str(output_path))
+
+        input_path.write_text("0:[browser=8] yes=2,no=1\n2:leaf=1\n1:leaf=2")
+        with pytest.raises(ValueError):
+            StrategyTree.write_strategies_pipelined(str(input_path), str(output_path), output_format="csv", queue_size=1)
+
+        input_path.write_text("1:leaf=1\n2:leaf=2")
+        with pytest.raises(KeyError):
+            StrategyTree.from_file(str(input_path))
+        with pytest.raises(KeyError):
+            StrategyTree.write_strategies_pipelined(str(input_path), str(output_path))
+
+    def test_strategy_tree_write_minimized_strategies(self, tmp_path):
+        tree = StrategyTree.from_string(
+            "0:[browser=7||or||browser=8] yes=1,no=2\n1:[os=5] yes=3,no=4\n2:[os=5] yes=5,no=6\n"
+            "3:leaf=1\n4:leaf=2\n5:leaf=1\n6:leaf=3"
+        )
+        output_path = tmp_path / "strategies.txt"
+        tree.write_strategies(str(output_path), minimize_passes=8)
+
+        lines = output_path.read_text().splitlines()
+        assert len(lines) == 4
+        assert "if (os=5) then 1.0" in lines
+
+    def test_strategy_tree_prunes_contradicting_subtrees(self, monkeypatch):
+        import strategy_tree
+
+        leaves_reached = []
+        from_state = strategy_tree.Strategy.from_state
+
+        def counting_from_state(state, value):
+            leaves_reached.append(value)
+            return from_state(state, value)
+
+        monkeypatch.setattr(strategy_tree.Strategy, "from_state", counting_from_state)
+
+        tree = StrategyTree.from_string(
+            "0:[phone=5] yes=1,no=2\n1:[phone=7] yes=3,no=4\n3:[a=1] yes=5,no=6\n2:leaf=1\n4:leaf=2\n5:leaf=3\n6:leaf=4"
+        )
+
+        assert tree.get_strategies() == {
+            Strategy(conditions=frozenset([NotEqualsCondition("phone", 5)]), value=1.0),
+            Strategy(conditions=frozenset([EqualsCondition("phone", 5)]), value=2.0),
+        }
+        assert leaves_reached == [1.0, 2.0]
+
+    def test_strategy_tree_parallel_strategies(self):
+        serial_strategies = self.strategy_tree.get_strategies()
+
+        for frontier_depth in (0, 1, 2, 10):
+            assert self.strategy_tree.get_strategies(max_workers=2, frontier_depth=frontier_depth) == serial_strategies
+
+        strategies = list(self.strategy_tree.iter_strategies(max_workers=2, frontier_depth=1))
+        assert len(strategies) == len(serial_strategies)
+
+    def test_strategy_tree_script_workers(self, tmp_path):
+        import subprocess
+        import sys
+        from os import path
+        import strategy_tree
+        from tree_generator import generate
+
+        # Run as a script, the workers must get the same tree as in process
+        tree_path = tmp_path / "tree.txt"
+        tree_path.write_text(generate(8, seed=1))
+        output_path = tmp_path / "strategies.txt"
+        subprocess.run(
+            [sys.executable, path.abspath(strategy_tree.__file__), "-f", str(tree_path), "-o", str(output_path),
+             "-j", "2", "--frontier-depth", "2", "--sort"],
+            check=True
+        )
+
+        expected_path = tmp_path / "expected.txt"
+        StrategyTree.from_file(str(tree_path)).write_strategies(str(expected_path), sort_chunk_size=1000)
+        assert output_path.read_text() == expected_path.read_text()
+
+    def test_strategy_tree_rejects_ignored_options(self, resources_path, tmp_path, monkeypatch):
+        import sys
+        from os import path
+        from strategy_tree import get_arg_parser, run
+
+        cache_path = str(tmp_path / "subtrees.pkl")
+        for mode, option in (
+            (["--compact"], ["-j", "2"]), (["--compact"], ["--frontier-depth", "2"]), (["--compact"], ["--memoize"]),
+            (["--compact"], ["--subtree-cache", cache_path]),
+            (["--subtree-cache", cache_path], ["-j", "2"]), (["--subtree-cache", cache_path], ["--frontier-depth", "2"]),
+            (["--subtree-cache", cache_path], ["--memoize"]), (["--subtree-cache", cache_path], ["--dedupe-window", "10"]),
+        ):
+            monkeypatch.setattr(sys, "argv", [
+                "dv_strategies", "-f", path.join(resources_path, "simple_tree.txt"), "-o", str(tmp_path / "strategies.txt"),
+                *mode, *option
+            ])
+            with pytest.raises(ValueError, match=option[0].replace("-j", "--workers")):
+                run(get_arg_parser())
+
+        assert not path.exists(cache_path)
+
+    def test_strategy_tree_parallel_deep_tree(self):
+        import sys
+        from strategy_forest import StrategyForest
+
+        # Deeper than pickle can recurse through linked nodes. Every condition after the first one is implied, so
+        # the strategies stay short
+        depth = sys.getrecursionlimit() + 200
+        lines = [f"{index}:[x=1] yes={index + 1},no={depth + index}" for index in range(depth)]
+        lines += [f"{depth + index}:leaf={index}" for index in range(depth + 1)]
+        tree = StrategyTree.from_string("\n".join(lines))
+        serial_strategies = tree.get_strategies()
+
+        assert len(serial_strategies) == 2
+        assert tree.get_strategies(max_workers=2, frontier_depth=3) == serial_strategies
+        assert StrategyForest({0: tree}).get_strategies(max_workers=2) == {0: serial_strategies}
+
+    def test_strategy_tree_disjoint_strategies(self):
+        from itertools import product
+
+        tree = StrategyTree.from_string(
+            "0:[a=1||or||b=2||or||c=3] yes=1,no=2\n1:[d=4] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3"
+        )
+        strategies = tree.get_strategies(disjoint=True)
+
+        assert len(strategies) == 7
+        assert Strategy(
+            conditions=frozenset([NotEqualsCondition("a", 1), EqualsCondition("b", 2), EqualsCondition("d", 4)]),
+            value=2.0
+        ) in strategies
+
+        for a, b, c, d in product((0, 1), (0, 2), (0, 3), (0, 4)):
+            features = {"a": a, "b": b, "c": c, "d": d}
+            matching = [
+                strategy for strategy in strategies
+                if all(condition.evaluate(features) for condition in strategy.conditions)
+            ]
+            assert len(matching) == 1
+            assert matching[0].value == tree.predict(features)
+
+        assert tree.get_strategies(max_workers=2, frontier_depth=1, disjoint=True) == strategies
+        assert self.strategy_tree.get_strategies(max_workers=2, frontier_depth=2, disjoint=True) == (
+            self.strategy_tree.get_strategies(disjoint=True)
+        )
+
+    def test_strategy_tree_memoized_strategies(self, monkeypatch):
+        import strategy_tree
+
+        assert self.strategy_tree.get_strategies(memoize=True) == self.strategy_tree.get_strategies()
+        assert self.strategy_tree.get_strategies(memoize=True, disjoint=True) == (
+            self.strategy_tree.get_strategies(disjoint=True)
+        )
+
+        # Every node is the yes and no child of the previous one, a plain walk visits 2^depth paths
+        depth = 10
+        tree = StrategyTree.from_string("\n".join(
+            [f"{level}:[x{level}=1||or||y=2] yes={level + 1},no={level + 1}" for level in range(depth)]
+            + [f"{depth}:leaf=1"]
+        ))
+        strategies = tree.get_strategies()
+
+        branches_calls = []
+        branches = strategy_tree.StrategyTree._branches
+
+        def counting_branches(self, node, state, disjoint=False):
+            branches_calls.append(node.id)
+            return branches(self, node, state, disjoint)
+
+        monkeypatch.setattr(strategy_tree.StrategyTree, "_branches", counting_branches)
+
+        assert tree.get_strategies(memoize=True) == strategies
+        assert len(branches_calls) < 3 * depth
+        assert tree.get_strategies(memoize=True, max_workers=2, frontier_depth=2) == strategies
+
+    def test_strategy_tree_memoized_deep_tree(self):
+        import sys
+
+        # Every node is the yes and no child of the previous one, deeper than the recursion limit
+        depth = sys.getrecursionlimit() * 2
+        lines = [f"{index}:[x=1] yes={index + 1},no={index + 1}" for index in range(depth)] + [f"{depth}:leaf=1"]
+        tree = StrategyTree.from_string("\n".join(lines))
+
+        assert len(tree.get_strategies(memoize=True)) == 2
+        assert tree.get_strategies(memoize=True) == tree.get_strategies()
+
+    def test_strategy_tree_predict(self):
+        assert self.strategy_tree.predict({"device_type": "pc"}) == 0.000708484
+        assert self.strategy_tree.predict({"device_type": "pc", "os_family": 5, "browser": 8, "language": 2}) == 0.000559453
+        assert self.strategy_tree.predict({"browser": 8}) == 0.000881108
+        assert self.strategy_tree.predict({}) == 0.000999001
+        assert StrategyTree.from_string("0:[a=1] yes=1,no=2\n1:leaf=1").predict({"a": 2}) is None
+
+    def test_strategy_tree_compile(self):
+        import itertools
+
+        predict = self.strategy_tree.compile()
+        domains = {
+            "device_type": ["pc", "mobile", None],
+            "browser": [5, 7, 8, None],
+            "os_family": [5, 6],
+            "language": [2, 3],
+            "size": ["300x600", None],
+            "position": [2, None],
+            "region": ["FR:A5", None],
+        }
+
+        for values in itertools.product(*domains.values()):
+            features = {variable: value for variable, value in zip(domains, values) if value is not None}
+            assert predict(features) == self.strategy_tree.predict(features)
+
+    def test_strategy_tree_compile_ranges(self):
+        tree = StrategyTree.from_string("0:[x>5||or||y<3] yes=1,no=2\n1:[x!=7] yes=3,no=4\n2:leaf=1\n3:leaf=2\n4:leaf=3")
+        predict = tree.compile()
+
+        for features in ({}, {"x": 6}, {"x": 7}, {"x": 5}, {"y": 2}, {"y": 3, "x": 5}, {"x": 7, "y": 1}):
+            assert predict(features) == tree.predict(features)
+
+    def test_strategy_tree_compile_deep_tree(self):
+        depth = StrategyTree.COMPILE_MAX_NESTING * 3
+        lines = [f"{index}:[x{index}=1] yes={index + 1},no={depth + index}" for index in range(depth)]
+        lines += [f"{depth + index}:leaf={index}" for index in range(depth + 1)]
+        tree = StrategyTree.from_string("\n".join(lines))
+        predict = tree.compile()
+
+        assert predict.source.count("def ") > 1
+        for index in (0, 1, StrategyTree.COMPILE_MAX_NESTING + 1, depth - 1):
+            features = {f"x{position}": 1 for position in range(index)}
+            assert predict(features) == tree.predict(features) == float(index)
+        assert predict({f"x{position}": 1 for position in range(depth)}) == 0.0
+
+    def test_strategy_tree_compile_beyond_recursion_limit(self):
+        import sys
+
+        depth = sys.getrecursionlimit() * 2
+        lines = [f"{index}:[x{index}=1] yes={index + 1},no={depth + index}" for index in range(depth)]
+        lines += [f"{depth + index}:leaf={index}" for index in range(depth + 1)]
+        tree = StrategyTree.from_string("\n".join(lines))
+        predict = tree.compile()
+
+        features = {f"x{position}": 1 for position in range(depth - 1)}
+        assert predict(features) == tree.predict(features) == float(depth - 1)
+
+    def test_strategy_tree_predict_batch(self):
+        np = pytest.importorskip("numpy")
+
+        rows = [
+            {"device_type": "pc"},
+            {"device_type": "pc", "os_family": 5, "browser": 8, "language": 2},
+            {"browser": 8},
+            {"device_type": "mobile", "browser": 5, "os_family": 6, "region": "FR:A5"},
+            {"browser": 7, "os_family": 5, "size": "300x600"},
+            {},
+        ]
+        categories = ["pc", "mobile"]
+        columns = {
+            "device_type": (
+                np.array([categories.index(row["device_type"]) if "device_type" in row else -1 for row in rows]),
+                categories
+            ),
+            "browser": np.array([row.get("browser", np.nan) for row in rows]),
+            "os_family": np.array([row.get("os_family", np.nan) for row in rows]),
+            "language": np.array([row.get("language", np.nan) for row in rows]),
+            "size": np.array([row.get("size", "") for row in rows]),
+            "region": np.array([row.get("region", "") for row in rows]),
+        }
+
+        assert self.strategy_tree.predict_batch(columns).tolist() == [self.strategy_tree.predict(row) for row in rows]
+
+    def test_strategy_tree_predict_batch_ranges(self):
+        np = pytest.importorskip("numpy")
+
+        tree = StrategyTree.from_string("0:[x>5||or||y<3] yes=1,no=2\n1:[x!=7] yes=3,no=4\n2:leaf=1\n3:leaf=2")
+        predictions = tree.predict_batch({"x": np.array([6, 7, 5, 5, np.nan]), "y": np.array([9, 9, 9, 1, np.nan])})
+
+        assert predictions[[0, 2, 3, 4]].tolist() == [2.0, 1.0, 2.0, 1.0]
+        assert np.isnan(predictions[1])
+        assert tree.predict_batch({}, size=2).tolist() == [1.0, 1.0]
+
+    def test_strategy_tree_invalid_condition(self):
+        with pytest.raises(ValueError):
+            StrategyTree.from_string("0:[browser] yes=2,no=1\n2:leaf=1\n1:leaf=2")
+
     def test_simple_tree(self, resources_path):
         from os import path
         
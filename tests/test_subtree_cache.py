@@ -0,0 +1,143 @@
+import pytest
+from subtree_cache import StrategyDiff, SubtreeCache
+from strategy_tree import StrategyTree
+from strategy import Strategy
+from conditions import EqualsCondition, NotEqualsCondition
+
+class TestSubtreeCache:
+
+    @pytest.fixture(autouse=True)
+    def setup(self, resources_path):
+        from os import path
+
+        with open(path.join(resources_path, "tree_to_convert__288_29.txt")) as file:
+            self.content = file.read()
+        self.tree = StrategyTree.from_string(self.content)
+
+    def test_subtree_hashes(self):
+        hashes = self.tree.subtree_hashes()
+        renumbered = StrategyTree.from_string(
+            "0:[a=1] yes=1,no=2\n1:[b=2] yes=3,no=4\n2:[b=2] yes=5,no=6\n3:leaf=1\n4:leaf=2\n5:leaf=1\n6:leaf=2"
+        ).subtree_hashes()
+
+        assert len(hashes) == 21
+        assert renumbered[1] == renumbered[2]
+        assert renumbered[3] == renumbered[5] != renumbered[4]
+        assert StrategyTree.from_string(self.content).subtree_hashes() == hashes
+        assert StrategyTree.from_string("0:leaf=8").subtree_hashes() != StrategyTree.from_string("0:leaf=9").subtree_hashes()
+
+    def test_subtree_cache_extract(self, tmp_path):
+        cache_path = str(tmp_path / "cache.pkl")
+
+        # The test tree has 21 nodes, every subtree of 3 nodes or more is kept
+        cache = SubtreeCache.load(cache_path)
+        strategies, diff = cache.extract(self.tree, min_cut_size=3)
+        cache.save(cache_path)
+
+        assert strategies == self.tree.get_strategies()
+        assert diff.added == strategies and not diff.removed
+        assert cache.hits == 0
+
+        retrained = StrategyTree.from_string(self.content.replace("leaf=0.000559453", "leaf=0.5"))
+        cache = SubtreeCache.load(cache_path)
+        strategies, diff = cache.extract(retrained, min_cut_size=3)
+
+        assert strategies == retrained.get_strategies()
+        assert cache.hits > 0
+        assert {strategy.value for strategy in diff.added} == {0.5}
+        assert {strategy.value for strategy in diff.removed} == {0.000559453}
+        assert len(diff.added) == len(diff.removed)
+
+        strategies, diff = cache.extract(retrained, min_cut_size=3)
+        assert not diff
+        assert cache.strategies() == strategies
+        assert cache.misses == 0 and not cache.modified
+
+    def test_subtree_cache_save(self, tmp_path):
+        import re
+        from array import array
+        from tree_generator import generate_lines
+
+        cache_path = str(tmp_path / "cache.pkl")
+        lines = list(generate_lines(8, seed=1))
+        cache = SubtreeCache()
+        cache.extract(StrategyTree.from_lines(lines), min_cut_size=16)
+        cache.save(cache_path)
+
+        # Saved entries are only decoded when looked up, an unchanged tree is a hit on the root
+        cache = SubtreeCache.load(cache_path)
+        strategies, diff = cache.extract(StrategyTree.from_lines(lines), min_cut_size=16)
+        assert strategies == StrategyTree.from_lines(lines).get_strategies()
+        assert not diff and cache.hits == 1 and not cache.modified
+        assert sum(isinstance(suffixes, array) for suffixes in cache.suffixes.values()) == len(cache.suffixes) - 1
+
+        # Retrained trees reuse the stored strategy table, entries left as stored are written back as they are
+        for leaf in range(3):
+            leaf_index = [index for index, line in enumerate(lines) if "leaf=" in line][leaf * 50]
+            lines[leaf_index] = re.sub(r"leaf=.*", f"leaf={leaf + 0.5}", lines[leaf_index])
+            tree = StrategyTree.from_lines(lines)
+
+            cache = SubtreeCache.load(cache_path)
+            strategies, diff = cache.extract(tree, min_cut_size=16)
+            assert cache.modified and cache.misses > 0
+            cache.save(cache_path)
+
+            assert strategies == tree.get_strategies()
+            assert SubtreeCache.load(cache_path).extract(tree, min_cut_size=16) == (strategies, StrategyDiff())
+
+    def test_subtree_cache_cut_points(self, tmp_path):
+        import pickle
+        from tree_generator import generate_tree
+
+        tree = generate_tree(8, seed=1)
+        sizes = tree.subtree_sizes()
+        cache = SubtreeCache()
+        strategies, _ = cache.extract(tree, min_cut_size=64)
+
+        assert sizes[tree.root.id] == 511
+        assert strategies == tree.get_strategies()
+        # Only the root and the subtrees of 64 nodes or more (the 6 top levels) are kept
+        assert {tree_hash for tree_hash, _ in cache.suffixes} == {
+            tree_hash for node_id, tree_hash in tree.subtree_hashes().items() if sizes[node_id] >= 64
+        }
+
+        # A cache saved in another format is started over
+        cache_path = tmp_path / "cache.pkl"
+        cache_path.write_bytes(pickle.dumps(cache))
+        assert SubtreeCache.load(str(cache_path)).root is None
+
+    def test_subtree_cache_deep_tree(self):
+        import sys
+
+        depth = sys.getrecursionlimit() * 2
+        lines = [f"{index}:[x{index % 7}=1] yes={index + 1},no={depth + index}" for index in range(depth)]
+        lines += [f"{depth + index}:leaf={index}" for index in range(depth + 1)]
+        tree = StrategyTree.from_string("\n".join(lines))
+
+        assert len(tree.subtree_hashes()) == 2 * depth
+        assert SubtreeCache().extract(tree)[0] == tree.get_strategies()
+
+    def test_subtree_cache_disjoint(self):
+        cache = SubtreeCache()
+        cache.extract(self.tree)
+
+        strategies, _ = cache.extract(self.tree, disjoint=True)
+        assert strategies == self.tree.get_strategies(disjoint=True)
+        assert cache.disjoint
+
+    def test_subtree_cache_leaf_root(self):
+        cache = SubtreeCache()
+        cache.extract(StrategyTree.from_string("0:leaf=1"))
+        _, diff = cache.extract(StrategyTree.from_string("0:leaf=2"))
+
+        assert diff.added == {Strategy(conditions=frozenset(), value=2.0)}
+        assert diff.removed == {Strategy(conditions=frozenset(), value=1.0)}
+
+    def test_strategy_diff_str(self):
+        diff = StrategyDiff(
+            added={Strategy(conditions=frozenset([EqualsCondition("a", 1)]), value=1.0)},
+            removed={Strategy(conditions=frozenset([NotEqualsCondition("a", 1)]), value=1.0)}
+        )
+
+        assert str(diff) == "+ if (a=1) then 1.0\n- if (a!=1) then 1.0"
+        assert not StrategyDiff()
@@ -0,0 +1,50 @@
+import pytest
+from tree_generator import generate, generate_lines, generate_tree, parse_operators
+from strategy_tree import StrategyTree, ConditionNode, LeafNode
+
+class TestTreeGenerator:
+
+    def test_generate_full_tree(self):
+        lines = list(generate_lines(6, or_fanout=3, variables=4, cardinality=3, seed=1))
+        tree = StrategyTree.from_lines(lines)
+
+        assert len(lines) == 2 ** 7 - 1
+        assert sum(line.split(":", 1)[1].startswith("leaf=") for line in lines) == 2 ** 6
+
+        def depths(node, depth=0):
+            if isinstance(node, LeafNode):
+                yield depth
+            else:
+                assert 1 <= len(node.conditions) <= 3
+                assert all(condition.variable in {"f0", "f1", "f2", "f3"} for condition in node.conditions)
+                assert all(condition.value in range(3) for condition in node.conditions)
+                yield from depths(node.true_branch, depth + 1)
+                yield from depths(node.false_branch, depth + 1)
+
+        assert set(depths(tree.root)) == {6}
+        assert tree.get_strategies()
+
+    def test_generate_is_deterministic(self):
+        assert generate(8, or_fanout=2, seed=3) == generate(8, or_fanout=2, seed=3)
+        assert generate(8, or_fanout=2, seed=3) != generate(8, or_fanout=2, seed=4)
+
+    def test_generate_operator_mix(self):
+        tree = generate_tree(5, operators={"!=": 1}, seed=0)
+
+        node = tree.root
+        while isinstance(node, ConditionNode):
+            assert {condition.operator for condition in node.conditions} == {"!="}
+            node = node.true_branch
+
+        with pytest.raises(ValueError):
+            list(generate_lines(3, operators={"~": 1}))
+
+    def test_generate_early_leaves(self):
+        lines = list(generate_lines(10, leaf_probability=0.5, seed=0))
+
+        assert len(lines) < 2 ** 11 - 1
+        assert StrategyTree.from_lines(lines).get_strategies()
+        assert list(generate_lines(0)) == ["0:leaf=0.844422"]
+
+    def test_parse_operators(self):
+        assert parse_operators("=:5,!=:3,>:1") == {"=": 5.0, "!=": 3.0, ">": 1.0}